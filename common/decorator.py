@@ -1,6 +1,15 @@
 import functools
 import logging
 import inspect
+import time
+from fastmcp.server.dependencies import get_http_request
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
+from config.config import Config
+from core.deadline import DeadlineExceeded, bounded, deadline
+from core.json_codec import dumps
+from core.metrics import tool_calls, tool_errors, tool_latency
+from core.scheduler import flow_context
 
 def log_function_call(func):
     @functools.wraps(func)
@@ -29,3 +38,93 @@ def log_function_call(func):
         return await func(*args, **kwargs)
 
     return wrapper
+
+
+def measure_tool_call(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        tool_name = func.__name__
+        start = time.monotonic()
+        failed = True
+        try:
+            result = await func(*args, **kwargs)
+            failed = isinstance(result, dict) and result.get("status") == "error"
+            return result
+        finally:
+            tool_calls.inc(tool=tool_name)
+            if failed:
+                tool_errors.inc(tool=tool_name)
+            tool_latency.observe(time.monotonic() - start, tool=tool_name)
+
+    return wrapper
+
+
+def with_deadline(func):
+    """Bound the tool, and every upstream call it makes, to TOOL_TIMEOUT_SECONDS (per tool: {TOOL}_TOOL_TIMEOUT_SECONDS)."""
+    timeout = Config.for_tool(func.__name__, "TOOL_TIMEOUT_SECONDS")
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with deadline(timeout):
+            try:
+                return await bounded(func(*args, **kwargs), timeout)
+            except DeadlineExceeded as e:
+                error_message = f"{func.__name__} timed out: {e}"
+                logging.error(error_message)
+                return {"status": "error", "message": error_message}
+
+    return wrapper
+
+
+def _session_key() -> str:
+    """
+    Mcp-Session-Id of the current request. Stateless mode (multi-worker) issues none,
+    so the SESSION_KEY_HEADER value or, failing that, the client address stands in.
+    """
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return "local"
+    session_id = request.headers.get("mcp-session-id")
+    if session_id:
+        return session_id
+    client_id = request.headers.get(Config.SESSION_KEY_HEADER) if Config.SESSION_KEY_HEADER else None
+    if client_id:
+        return f"key:{client_id}"
+    return f"client:{request.client.host}" if request.client else "local"
+
+
+def prioritized(priority: int):
+    """Queue the tool's upstream calls at `priority` (core.scheduler) under the caller's session."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with flow_context(_session_key(), priority):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def json_result(func):
+    """
+    Encode the tool's dict result once with core.json_codec and hand FastMCP a ready ToolResult.
+
+    FastMCP would otherwise walk and re-encode the dict several times per call. Tool
+    results are built from decoded upstream JSON, so the dict is passed through as
+    the structured content unchanged; anything the codec cannot encode is left to
+    FastMCP's own conversion.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        if not isinstance(result, dict):
+            return result
+        try:
+            text = dumps(result).decode("utf-8")
+        except (TypeError, ValueError):
+            return result
+        return ToolResult.model_construct(content=[TextContent(type="text", text=text)], structured_content=result)
+
+    return wrapper
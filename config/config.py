@@ -1,21 +1,126 @@
 from dotenv import load_dotenv
 from os import getenv
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 load_dotenv()
 
 class Config:
+    SERVER_HOST = getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT = int(getenv("SERVER_PORT", "8080"))
+    SERVER_WORKERS = int(getenv("SERVER_WORKERS", "1"))
+    SESSION_KEY_HEADER = getenv("SESSION_KEY_HEADER", "X-Client-Id")
+    METRICS_PUBLISH_SECONDS = float(getenv("METRICS_PUBLISH_SECONDS", "5"))
     LOG_FILE_PATH = getenv("LOG_FILE_PATH", "logs/mcp-api-wrapper.log")
     LOG_MAX_BYTES = int(getenv("LOG_MAX_BYTES", "10485760"))
     LOG_BACKUP_COUNT = int(getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_LEVEL = getenv("LOG_LEVEL", "INFO").upper()
+    LOG_BODY_MAX_CHARS = int(getenv("LOG_BODY_MAX_CHARS", "4096"))
+    JSON_CODEC = getenv("JSON_CODEC", "auto")
     TIME_OUT_SECONDS = int(getenv("TIME_OUT_SECONDS", "600"))
+    REQUEST_TIMEOUT_SECONDS = float(getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    TOOL_TIMEOUT_SECONDS = float(getenv("TOOL_TIMEOUT_SECONDS", "60"))
+    HEDGE_ENABLED = getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_QUANTILE = float(getenv("HEDGE_QUANTILE", "0.95"))
+    HEDGE_MIN_DELAY_SECONDS = float(getenv("HEDGE_MIN_DELAY_SECONDS", "0.05"))
+    HEDGE_MIN_SAMPLES = int(getenv("HEDGE_MIN_SAMPLES", "20"))
     API_MAX_CONCURRENT = int(getenv("API_MAX_CONCURRENT", "5"))
+    LIMITER_MIN_CONCURRENT = int(getenv("LIMITER_MIN_CONCURRENT", "1"))
+    LIMITER_MAX_CONCURRENT = int(getenv("LIMITER_MAX_CONCURRENT", "50"))
+    LIMITER_BACKOFF_RATIO = float(getenv("LIMITER_BACKOFF_RATIO", "0.9"))
+    LIMITER_MAX_QUEUE = int(getenv("LIMITER_MAX_QUEUE", "100"))
+    LIMITER_MAX_QUEUE_WAIT_SECONDS = float(getenv("LIMITER_MAX_QUEUE_WAIT_SECONDS", "5"))
+    LIMITER_LATENCY_TOLERANCE = float(getenv("LIMITER_LATENCY_TOLERANCE", "2.0"))
+    SCHEDULER_WEIGHT_INTERACTIVE = float(getenv("SCHEDULER_WEIGHT_INTERACTIVE", "8"))
+    SCHEDULER_WEIGHT_BULK = float(getenv("SCHEDULER_WEIGHT_BULK", "2"))
+    SCHEDULER_WEIGHT_BACKGROUND = float(getenv("SCHEDULER_WEIGHT_BACKGROUND", "1"))
+    HTTP_CONNECT_TIMEOUT_SECONDS = float(getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_MAX_CONNECTIONS = int(getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS = float(getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTTP2_ENABLED = getenv("HTTP2_ENABLED", "false").lower() == "true"
+    MAX_RESPONSE_BYTES = int(getenv("MAX_RESPONSE_BYTES", "67108864"))
+    RESPONSE_SPILL_BYTES = int(getenv("RESPONSE_SPILL_BYTES", "8388608"))
+    CACHE_TTL_SECONDS = float(getenv("CACHE_TTL_SECONDS", "30"))
+    CACHE_STALE_SECONDS = float(getenv("CACHE_STALE_SECONDS", "60"))
+    CACHE_MAX_ENTRIES = int(getenv("CACHE_MAX_ENTRIES", "1024"))
+    RATE_LIMIT_PER_SECOND = float(getenv("RATE_LIMIT_PER_SECOND", "0"))
+    RATE_LIMIT_BURST = int(getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_FOLLOW_HEADERS = getenv("RATE_LIMIT_FOLLOW_HEADERS", "true").lower() == "true"
+    CACHE_WARM_ENABLED = getenv("CACHE_WARM_ENABLED", "false").lower() == "true"
+    CACHE_WARM_INTERVAL_SECONDS = float(getenv("CACHE_WARM_INTERVAL_SECONDS", "5"))
+    CACHE_WARM_MIN_HITS = float(getenv("CACHE_WARM_MIN_HITS", "3"))
+    CACHE_WARM_HALF_LIFE_SECONDS = float(getenv("CACHE_WARM_HALF_LIFE_SECONDS", "300"))
+    CACHE_WARM_MAX_KEYS = int(getenv("CACHE_WARM_MAX_KEYS", "20"))
+    CACHE_WARM_MAX_TRACKED_KEYS = int(getenv("CACHE_WARM_MAX_TRACKED_KEYS", "1000"))
+    PREFETCH_ENABLED = getenv("PREFETCH_ENABLED", "false").lower() == "true"
+    PREFETCH_TOP_N = int(getenv("PREFETCH_TOP_N", "5"))
+    PREFETCH_MAX_IN_FLIGHT = int(getenv("PREFETCH_MAX_IN_FLIGHT", "2"))
+    RETRY_MAX_ATTEMPTS = int(getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY_SECONDS = float(getenv("RETRY_BASE_DELAY_SECONDS", "0.1"))
+    RETRY_MAX_DELAY_SECONDS = float(getenv("RETRY_MAX_DELAY_SECONDS", "5"))
+    RETRY_AFTER_MAX_SECONDS = float(getenv("RETRY_AFTER_MAX_SECONDS", "30"))
+    BREAKER_FAILURE_THRESHOLD = int(getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT_SECONDS = float(getenv("BREAKER_RESET_TIMEOUT_SECONDS", "30"))
+    BATCH_MAX_IDS = int(getenv("BATCH_MAX_IDS", "100"))
+    LIST_PAGE_DEFAULT_LIMIT = int(getenv("LIST_PAGE_DEFAULT_LIMIT", "100"))
+    LIST_PAGE_MAX_LIMIT = int(getenv("LIST_PAGE_MAX_LIMIT", "1000"))
+    LIST_SNAPSHOT_TTL_SECONDS = float(getenv("LIST_SNAPSHOT_TTL_SECONDS", "120"))
+    LIST_SNAPSHOT_MAX_ENTRIES = int(getenv("LIST_SNAPSHOT_MAX_ENTRIES", "64"))
+    INDEX_ENABLED = getenv("INDEX_ENABLED", "false").lower() == "true"
+    INDEX_REFRESH_SECONDS = float(getenv("INDEX_REFRESH_SECONDS", "300"))
+    DISK_CACHE_ENABLED = getenv("DISK_CACHE_ENABLED", "true" if SERVER_WORKERS > 1 else "false").lower() == "true"
+    DISK_CACHE_DIR = getenv("DISK_CACHE_DIR", os.path.join(os.path.dirname(LOG_FILE_PATH), "cache"))
+    DISK_CACHE_MAX_BYTES = int(getenv("DISK_CACHE_MAX_BYTES", "268435456"))
+    AUTH_ENABLED = getenv("AUTH_ENABLED", "false").lower() == "true"
+    AUTH_TOKEN_TTL_SECONDS = float(getenv("AUTH_TOKEN_TTL_SECONDS", "3600"))
+    AUTH_REFRESH_MARGIN_SECONDS = float(getenv("AUTH_REFRESH_MARGIN_SECONDS", "60"))
+    AUTH_RETRY_BASE_DELAY_SECONDS = float(getenv("AUTH_RETRY_BASE_DELAY_SECONDS", "1"))
+    AUTH_RETRY_MAX_DELAY_SECONDS = float(getenv("AUTH_RETRY_MAX_DELAY_SECONDS", "60"))
     API_ACCESS_TOKEN = getenv("API_ACCESS_TOKEN")
     API_SECRET_KEY = getenv("API_SECRET_KEY")
 
+    # Set by the multi-worker supervisor; inherited by its worker processes.
+    SUPERVISOR_PID_ENV = "MCP_SUPERVISOR_PID"
+
     _initialized = False
+    _log_listener = None
+
+    @classmethod
+    def for_upstream(cls, upstream: str, key: str):
+        """Return setting `key`, overridable per upstream with e.g. SYSTEM2_HTTP_MAX_CONNECTIONS."""
+        default = getattr(cls, key)
+        value = getenv(f"{upstream.upper()}_{key}")
+        if value is None or default is None:
+            return default if value is None else value
+        if isinstance(default, bool):
+            return value.lower() == "true"
+        return type(default)(value)
+
+    @classmethod
+    def for_tool(cls, tool_name: str, key: str):
+        """Return setting `key`, overridable per tool with e.g. GET_USER_LIST_TOOL_TIMEOUT_SECONDS."""
+        return cls.for_upstream(tool_name, key)
+
+    @classmethod
+    def per_worker(cls, value: int) -> int:
+        """Split a host-wide budget (connections, concurrency) evenly across worker processes."""
+        return max(1, -(-value // max(1, cls.SERVER_WORKERS)))
+
+    @classmethod
+    def log_file_path(cls) -> str:
+        """
+        LOG_FILE_PATH, or e.g. logs/mcp-api-wrapper.worker-1234.log in a worker process
+        of multi-worker mode: RotatingFileHandler cannot share a file between processes.
+        """
+        supervisor = getenv(cls.SUPERVISOR_PID_ENV)
+        if supervisor and supervisor != str(os.getpid()):
+            root, ext = os.path.splitext(cls.LOG_FILE_PATH)
+            return f"{root}.worker-{os.getpid()}{ext}"
+        return cls.LOG_FILE_PATH
 
     @classmethod
     def init(cls):
@@ -24,7 +129,7 @@ class Config:
         cls._initialized = True
 
         logger = logging.getLogger()
-        logger.setLevel(logging.DEBUG)
+        logger.setLevel(cls.LOG_LEVEL)
 
         formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
 
@@ -34,7 +139,7 @@ class Config:
 
         os.makedirs(os.path.dirname(cls.LOG_FILE_PATH), exist_ok=True)
         file_handler = RotatingFileHandler(
-            cls.LOG_FILE_PATH,
+            cls.log_file_path(),
             maxBytes=cls.LOG_MAX_BYTES,
             backupCount=cls.LOG_BACKUP_COUNT,
             encoding="utf-8",
@@ -42,5 +147,20 @@ class Config:
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(formatter)
 
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        # Handlers run on a background thread so console/file I/O never blocks the event loop.
+        log_queue = queue.SimpleQueue()
+        cls._log_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        cls._log_listener.start()
+        atexit.register(cls.shutdown_logging)
+
+        logger.addHandler(QueueHandler(log_queue))
+
+        # httpx logs every request URL at INFO, query string included (login credentials when LOGIN_METHOD=GET).
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+    @classmethod
+    def shutdown_logging(cls):
+        if cls._log_listener is not None:
+            cls._log_listener.stop()
+            cls._log_listener = None
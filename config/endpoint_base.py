@@ -0,0 +1,14 @@
+class EndpointBase:
+    NAME = "default"
+    API_BASE_URL = None
+
+    @classmethod
+    def url_prefixes(cls):
+        prefixes = []
+        for attr_name in dir(cls):
+            if not attr_name.endswith("_URL") or attr_name == "API_BASE_URL":
+                continue
+            url = getattr(cls, attr_name)
+            if isinstance(url, str):
+                prefixes.append(url)
+        return prefixes
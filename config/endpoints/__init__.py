@@ -0,0 +1,20 @@
+from config.endpoint_base import EndpointBase
+from config.endpoints.system1 import System1Endpoints
+from config.endpoints.system2 import System2Endpoints
+
+UPSTREAMS = [System1Endpoints, System2Endpoints]
+
+
+def resolve_upstream(api_url: str) -> str:
+    """Return the upstream name that owns api_url (longest matching endpoint prefix wins)."""
+    best_name = EndpointBase.NAME
+    best_length = -1
+    for upstream in UPSTREAMS:
+        candidates = upstream.url_prefixes()
+        if upstream.API_BASE_URL:
+            candidates.append(upstream.API_BASE_URL)
+        for prefix in candidates:
+            if api_url.startswith(prefix) and len(prefix) > best_length:
+                best_name = upstream.NAME
+                best_length = len(prefix)
+    return best_name
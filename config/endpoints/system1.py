@@ -1,10 +1,13 @@
 from os import getenv
 from dotenv import load_dotenv
+from config.config import Config
+from config.endpoint_base import EndpointBase
 
 load_dotenv()
 
 
-class System1Endpoints:
+class System1Endpoints(EndpointBase):
+    NAME = "system1"
     PROTOCOL = getenv("PROTOCOL", "http")
     API_HOST_NAME = getenv("API_HOST_NAME")
     API_PATH = getenv("API_PATH")
@@ -18,6 +21,13 @@ class System1Endpoints:
 
     LOGIN_URL = f"{API_BASE_URL}/login"
     LOGOUT_URL = f"{API_BASE_URL}/logout"
+    LOGIN_METHOD = getenv("LOGIN_METHOD", "POST")
 
     TEMPLATE_LIST_URL = f"{API_BASE_URL}/templates"
     TEMPLATE_DETAIL_URL = f"{API_BASE_URL}/templates"
+
+    TEMPLATE_LIST_CACHE_TTL = float(getenv("TEMPLATE_LIST_CACHE_TTL", Config.CACHE_TTL_SECONDS))
+    TEMPLATE_DETAIL_CACHE_TTL = float(getenv("TEMPLATE_DETAIL_CACHE_TTL", Config.CACHE_TTL_SECONDS))
+    TEMPLATE_LIST_TIMEOUT = float(getenv("TEMPLATE_LIST_TIMEOUT", Config.for_upstream(NAME, "REQUEST_TIMEOUT_SECONDS")))
+    TEMPLATE_DETAIL_TIMEOUT = float(getenv("TEMPLATE_DETAIL_TIMEOUT", Config.for_upstream(NAME, "REQUEST_TIMEOUT_SECONDS")))
+    TEMPLATE_LIST_UPSTREAM_PAGING = getenv("TEMPLATE_LIST_UPSTREAM_PAGING", "false").lower() == "true"
@@ -1,10 +1,13 @@
 from os import getenv
 from dotenv import load_dotenv
+from config.config import Config
+from config.endpoint_base import EndpointBase
 
 load_dotenv()
 
 
-class System2Endpoints:
+class System2Endpoints(EndpointBase):
+    NAME = "system2"
     PROTOCOL = getenv("SYSTEM2_PROTOCOL", "http")
     API_HOST_NAME = getenv("SYSTEM2_HOST_NAME")
 
@@ -15,3 +18,9 @@ class System2Endpoints:
 
     USER_LIST_URL = f"{API_BASE_URL}/users"
     USER_DETAIL_URL = f"{API_BASE_URL}/users"
+
+    USER_LIST_CACHE_TTL = float(getenv("SYSTEM2_USER_LIST_CACHE_TTL", Config.CACHE_TTL_SECONDS))
+    USER_DETAIL_CACHE_TTL = float(getenv("SYSTEM2_USER_DETAIL_CACHE_TTL", Config.CACHE_TTL_SECONDS))
+    USER_LIST_TIMEOUT = float(getenv("SYSTEM2_USER_LIST_TIMEOUT", Config.for_upstream(NAME, "REQUEST_TIMEOUT_SECONDS")))
+    USER_DETAIL_TIMEOUT = float(getenv("SYSTEM2_USER_DETAIL_TIMEOUT", Config.for_upstream(NAME, "REQUEST_TIMEOUT_SECONDS")))
+    USER_LIST_UPSTREAM_PAGING = getenv("SYSTEM2_USER_LIST_UPSTREAM_PAGING", "false").lower() == "true"
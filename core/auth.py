@@ -0,0 +1,178 @@
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from config.config import Config
+from config.endpoints import UPSTREAMS
+from core.http_client import http_clients
+from core.json_codec import loads
+from core.metrics import labels, metrics
+from core.singleflight import SingleFlight
+
+
+class AuthError(Exception):
+    """Login against an upstream failed; the request cannot be authenticated."""
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"login to {upstream} failed: {reason}")
+        self.upstream = upstream
+
+
+class AuthSession:
+    """
+    One logged-in session per upstream.
+
+    The token is fetched lazily, reused by every request and refreshed
+    `refresh_margin` seconds before it expires. Concurrent refreshes share one
+    login call. After a failed login, further attempts are refused for a delay that
+    doubles per consecutive failure, so an unreachable or misconfigured login
+    endpoint is not hammered by every request.
+    """
+
+    def __init__(self, upstream: str, login_url: str, logout_url: Optional[str], login_method: str,
+                 access_token: Optional[str], secret_key: Optional[str], token_ttl: float, refresh_margin: float,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 60.0):
+        self.upstream = upstream
+        self.login_url = login_url
+        self.logout_url = logout_url
+        self.login_method = login_method.upper()
+        self.access_token = access_token
+        self.secret_key = secret_key
+        self.token_ttl = token_ttl
+        self.refresh_margin = refresh_margin
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._failed_in_row = 0
+        self._retry_at = 0.0
+        self._refresh = SingleFlight()
+        self.logins = 0
+        self.failures = 0
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at - self.refresh_margin
+
+    async def headers(self) -> Dict[str, str]:
+        if self._valid():
+            token = self._token
+        else:
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise AuthError(self.upstream, f"{self._failed_in_row} consecutive failures, next attempt in {wait:.1f}s")
+            token = await self._refresh.do("login", self._login)
+        return {"Authorization": f"Bearer {token}"}
+
+    def invalidate(self, headers: Dict[str, str]):
+        """Drop the token sent in `headers` (after a 401), unless another request already replaced it."""
+        if self._token is not None and headers.get("Authorization") == f"Bearer {self._token}":
+            self._token = None
+
+    async def _login(self) -> str:
+        credentials = {"access_token": self.access_token, "secret_key": self.secret_key}
+        credentials = {name: value for name, value in credentials.items() if value}
+        client = http_clients.get(self.upstream)
+        try:
+            # Credentials go in the body; only an upstream configured with LOGIN_METHOD=GET gets them in the URL.
+            response = await client.request(
+                self.login_method,
+                self.login_url,
+                params=credentials if self.login_method == "GET" else None,
+                json=credentials if self.login_method != "GET" else None,
+            )
+            response.raise_for_status()
+            body = loads(response.content)
+        except httpx.HTTPStatusError as e:
+            # Not str(e): it embeds the request URL, credentials included for a GET login.
+            raise self._failed(f"{e.response.status_code} {e.response.reason_phrase}") from e
+        except Exception as e:
+            raise self._failed(str(e) or type(e).__name__) from e
+
+        token = (body.get("token") or body.get("access_token")) if isinstance(body, dict) else None
+        if not token:
+            raise self._failed("response has no token")
+
+        expires_in = body.get("expires_in")
+        self._failed_in_row = 0
+        self._retry_at = 0.0
+        self._token = token
+        self._expires_at = time.monotonic() + (float(expires_in) if expires_in else self.token_ttl)
+        self.logins += 1
+        logging.info(f"Logged in to {self.upstream}; token valid for {self._expires_at - time.monotonic():.0f}s")
+        return token
+
+    def _failed(self, reason: str) -> AuthError:
+        self.failures += 1
+        self._failed_in_row += 1
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (self._failed_in_row - 1))
+        self._retry_at = time.monotonic() + delay
+        logging.warning(f"Login to {self.upstream} failed ({self._failed_in_row} in a row), retrying in {delay:.1f}s: {reason}")
+        return AuthError(self.upstream, reason)
+
+    async def logout(self):
+        if self._token is None or not self.logout_url:
+            return
+        headers = {"Authorization": f"Bearer {self._token}"}
+        self._token = None
+        try:
+            await http_clients.get(self.upstream).request(self.login_method, self.logout_url, headers=headers)
+            logging.info(f"Logged out of {self.upstream}")
+        except Exception as e:
+            logging.warning(f"Logout from {self.upstream} failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "authenticated": self._valid(),
+            "expires_in": round(max(0.0, self._expires_at - time.monotonic()), 1) if self._token else 0.0,
+            "logins": self.logins,
+            "failures": self.failures,
+        }
+
+
+class AuthRegistry:
+    """AuthSession per upstream that defines LOGIN_URL and has {UPSTREAM}_AUTH_ENABLED=true."""
+
+    def __init__(self):
+        self._sessions: Dict[str, Optional[AuthSession]] = {}
+
+    def get(self, upstream: str) -> Optional[AuthSession]:
+        if upstream not in self._sessions:
+            self._sessions[upstream] = self._build(upstream)
+        return self._sessions[upstream]
+
+    @staticmethod
+    def _build(upstream: str) -> Optional[AuthSession]:
+        endpoint = next((e for e in UPSTREAMS if e.NAME == upstream), None)
+        login_url = getattr(endpoint, "LOGIN_URL", None)
+        if not login_url or not Config.for_upstream(upstream, "AUTH_ENABLED"):
+            return None
+        return AuthSession(
+            upstream,
+            login_url=login_url,
+            logout_url=getattr(endpoint, "LOGOUT_URL", None),
+            login_method=getattr(endpoint, "LOGIN_METHOD", "POST"),
+            access_token=Config.for_upstream(upstream, "API_ACCESS_TOKEN"),
+            secret_key=Config.for_upstream(upstream, "API_SECRET_KEY"),
+            token_ttl=Config.for_upstream(upstream, "AUTH_TOKEN_TTL_SECONDS"),
+            refresh_margin=Config.for_upstream(upstream, "AUTH_REFRESH_MARGIN_SECONDS"),
+            retry_base_delay=Config.for_upstream(upstream, "AUTH_RETRY_BASE_DELAY_SECONDS"),
+            retry_max_delay=Config.for_upstream(upstream, "AUTH_RETRY_MAX_DELAY_SECONDS"),
+        )
+
+    async def aclose(self):
+        for session in self._sessions.values():
+            if session is not None:
+                await session.logout()
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: session.snapshot() for name, session in self._sessions.items() if session is not None}
+
+    def collect_logins(self) -> Dict[tuple, float]:
+        return {labels(upstream=name): session.logins for name, session in self._sessions.items() if session is not None}
+
+
+auth = AuthRegistry()
+
+metrics.callback("mcp_upstream_logins_total", "Upstream logins performed", auth.collect_logins, metric_type="counter")
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+from config.config import Config
+
+
+async def fetch_many(ids: List[str], fetch_one: Callable[[str], Awaitable[Dict[str, Any]]],
+                     concurrency: int) -> Dict[str, Any]:
+    """
+    Run fetch_one for each distinct id with at most `concurrency` calls in flight.
+
+    Returns {"results": {id: result}, "errors": {id: message}}; one failing id never
+    fails the whole batch.
+    """
+    unique_ids = list(dict.fromkeys(str(item_id) for item_id in ids))
+    if len(unique_ids) > Config.BATCH_MAX_IDS:
+        return {
+            "status": "error",
+            "message": f"Too many ids: {len(unique_ids)} (max {Config.BATCH_MAX_IDS})",
+        }
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item_id: str):
+        async with semaphore:
+            return await fetch_one(item_id)
+
+    outcomes = await asyncio.gather(*(run(item_id) for item_id in unique_ids), return_exceptions=True)
+
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for item_id, outcome in zip(unique_ids, outcomes):
+        if isinstance(outcome, Exception):
+            errors[item_id] = str(outcome) or type(outcome).__name__
+        elif isinstance(outcome, dict) and outcome.get("status") == "error":
+            errors[item_id] = outcome.get("message", "error")
+        else:
+            results[item_id] = outcome
+    return {"results": results, "errors": errors}
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from config.config import Config
+from core.metrics import labels, metrics
+
+
+def make_cache_key(http_method: str, api_url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    normalized = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+    return f"{http_method.upper()} {api_url}?{normalized}"
+
+
+class CacheEntry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, ttl: float, stale_seconds: float):
+        now = time.monotonic()
+        self.value = value
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_seconds
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def is_servable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class ResponseCache:
+    """
+    Bounded TTL + LRU cache for idempotent upstream responses.
+
+    Entries past their TTL but inside the stale window are still served while a
+    single background refresh replaces them (stale-while-revalidate).
+    """
+
+    def __init__(self, max_entries: int, stale_seconds: float):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or not entry.is_servable(now):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Entry for key without touching LRU order or hit statistics."""
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> CacheEntry:
+        entry = self._entries[key] = CacheEntry(value, ttl, self.stale_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def refresh_in_background(self, key: str, refresh_entry: Callable[[], Awaitable[Any]]):
+        """Run refresh_entry (which stores the new value) once per key in the background."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await refresh_entry()
+            except Exception as e:
+                logging.warning(f"Background refresh failed ({key}): {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseCache(Config.CACHE_MAX_ENTRIES, Config.CACHE_STALE_SECONDS)
+
+metrics.callback("mcp_cache_entries", "Entries in the response cache", lambda: {(): len(response_cache)})
+metrics.callback(
+    "mcp_cache_lookups_total",
+    "Response cache lookups by result",
+    lambda: {
+        labels(result="hit"): response_cache.hits,
+        labels(result="stale"): response_cache.stale_hits,
+        labels(result="miss"): response_cache.misses,
+    },
+    metric_type="counter",
+)
+metrics.callback("mcp_cache_evictions_total", "LRU evictions from the response cache",
+                 lambda: {(): response_cache.evictions}, metric_type="counter")
@@ -1,63 +1,352 @@
 import asyncio
 import httpx
 import logging
-import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Tuple
 from config.config import Config
+from config.endpoints import resolve_upstream
+from core.auth import AuthError, auth
+from core.cache import make_cache_key, response_cache
+from core.conditional import conditional_headers, validators
+from core.deadline import DeadlineExceeded, bounded, deadline, remaining
+from core.disk_cache import disk_cache
+from core.http_client import http_clients
+from core.limiter import AdmissionRejected, limiters
+from core.rate_limit import rate_limits
+from core.metrics import (
+    upstream_hedge_wins,
+    upstream_hedges,
+    upstream_latency,
+    upstream_oversized,
+    upstream_responses,
+    upstream_spilled,
+)
+from core.scheduler import as_background
+from core.resilience import (
+    IDEMPOTENT_METHODS,
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    CircuitOpenError,
+    breakers,
+    parse_retry_after,
+    retry_policy_for,
+)
+from core.singleflight import inflight
+from core.streaming import ResponseBody, ResponseTooLarge, read_body
+from core.warming import cache_warmer
 
-_api_semaphore = asyncio.Semaphore(Config.API_MAX_CONCURRENT)
 
-def log_requests_and_response(response: httpx.Response):
+# Credentials never reach the logs, even at DEBUG.
+REDACTED_HEADERS = {"authorization", "proxy-authorization", "cookie", "set-cookie"}
+
+
+def _redact(headers: httpx.Headers) -> Dict[str, str]:
+    return {name: "[redacted]" if name.lower() in REDACTED_HEADERS else value for name, value in headers.items()}
+
+
+def _truncate(body: ResponseBody, limit: int) -> str:
+    # Decode only the head of the body so a large one is never decoded in full just to be cut short;
+    # a UTF-8 character takes at most 4 bytes, so limit * 4 bytes hold at least `limit` characters.
+    if limit <= 0:
+        return body.head(0).decode("utf-8", errors="replace")
+    text = body.head(limit * 4).decode("utf-8", errors="replace")
+    if len(text) <= limit and body.size <= limit * 4:
+        return text
+    return f"{text[:limit]}... [truncated, {body.size} bytes in total]"
+
+
+def log_requests_and_response(response: httpx.Response, body: ResponseBody):
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
+
     try:
         req = response.request
-        body_content = req.content if req.body else "None"
+        body_content = req.content if req.content else "None"
 
         logging.debug("--- HTTP Request Details ---")
-        logging.debug(f"URL: {req.url}")
-        logging.debug(f"METHOD: {req.method}")
-        logging.debug(f"HEADERS: {dict(req.headers)}")
-        logging.debug(f"BODY: {body_content}")
+        logging.debug("URL: %s", req.url)
+        logging.debug("METHOD: %s", req.method)
+        logging.debug("HEADERS: %s", _redact(req.headers))
+        logging.debug("BODY: %s", body_content)
     except Exception as e:
         logging.warning(f"Error logging request: {e}")
 
     try:
-        response_data = response.text
-
-        try:
-            response_json = response.json()
-            response_data = json.dumps(response_json, indent=2, ensure_ascii=False)
-        except json.JSONDecodeError:
-            pass
-
         logging.debug("--- HTTP Response Details ---")
-        logging.debug(f"STATUS: {response.status_code}")
-        logging.debug(f"REASON: {response.reason_phrase}")
-        logging.debug(f"HEADERS: {dict(response.headers)}")
-        logging.debug(f"CONTENT: \n{response_data}")
+        logging.debug("STATUS: %s", response.status_code)
+        logging.debug("REASON: %s", response.reason_phrase)
+        logging.debug("HEADERS: %s", _redact(response.headers))
+        logging.debug("CONTENT: \n%s", _truncate(body, Config.LOG_BODY_MAX_CHARS))
         logging.debug("------------------------------")
 
     except Exception as e:
         logging.warning(f"Error logging response: {e}")
 
 
-async def call_api(api_url: str, params: Dict[str, Any] = None, http_method: str = "GET") -> Dict[str, Any]:
+async def _send(api_url: str, params: Optional[Dict[str, Any]], http_method: str, upstream: str,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[httpx.Response, ResponseBody]:
+    """
+    Send one request and read its body in chunks, under {UPSTREAM}_MAX_RESPONSE_BYTES.
+
+    Bodies over RESPONSE_SPILL_BYTES are spooled to a temp file as they arrive; the
+    caller owns the returned body and must close it.
+    """
+    client = http_clients.get(upstream)
+    max_bytes = Config.for_upstream(upstream, "MAX_RESPONSE_BYTES")
+    spill_bytes = Config.for_upstream(upstream, "RESPONSE_SPILL_BYTES")
+    bucket = rate_limits.get(upstream)
+    if bucket is not None:
+        # Before the concurrency slot, so pacing never holds a slot idle.
+        await bucket.acquire()
+
+    async with limiters.get(upstream).slot() as slot:
+        # Quota headers that arrived while this call queued may have created or paused the bucket.
+        learned = rate_limits.get(upstream)
+        if learned is not bucket:
+            await learned.acquire()
+        elif bucket is not None:
+            await bucket.wait_unpaused()
+        start = time.monotonic()
+        try:
+            request = client.build_request(
+                http_method,
+                api_url,
+                params=params if http_method == "GET" or http_method == "DELETE" else None,
+                json=params if http_method in ["POST", "PUT", "PATCH"] else None,
+                cookies=None,
+                headers=headers,
+            )
+            response = await client.send(request, stream=True)
+            # Time to headers: streaming a large body is not a sign of congestion.
+            slot.record(response.status_code, time.monotonic() - start)
+            body = await read_body(response, max_bytes, spill_bytes)
+        except httpx.TransportError as e:
+            upstream_latency.observe(time.monotonic() - start, upstream=upstream)
+            upstream_responses.inc(upstream=upstream, status=type(e).__name__)
+            raise
+        # Cancelled requests (deadline, losing hedge) are not observed: they would skew the hedge delay.
+        upstream_latency.observe(time.monotonic() - start, upstream=upstream)
+        upstream_responses.inc(upstream=upstream, status=response.status_code)
+
+    rate_limits.observe(upstream, response)
+
+    if body.oversized:
+        upstream_oversized.inc(upstream=upstream)
+        raise ResponseTooLarge(body.size, max_bytes)
+    if body.spilled:
+        upstream_spilled.inc(upstream=upstream)
+
+    log_requests_and_response(response, body)
+    return response, body
+
+
+def _hedge_delay(upstream: str) -> Optional[float]:
+    """Recent latency quantile of the upstream, or None until enough samples exist."""
+    if upstream_latency.count(upstream=upstream) < Config.for_upstream(upstream, "HEDGE_MIN_SAMPLES"):
+        return None
+    estimate = upstream_latency.quantile(Config.for_upstream(upstream, "HEDGE_QUANTILE"), upstream=upstream)
+    return max(Config.for_upstream(upstream, "HEDGE_MIN_DELAY_SECONDS"), estimate)
+
+
+async def _send_hedged(api_url: str, params: Optional[Dict[str, Any]], upstream: str,
+                       headers: Optional[Dict[str, str]]) -> Tuple[httpx.Response, ResponseBody]:
+    """
+    Send a GET; if it has not answered within the hedge delay, race a second copy
+    against it and return whichever succeeds first. No hedge is sent while the
+    upstream has no spare concurrency, so hedging cannot add to an overload.
+    """
+    delay = _hedge_delay(upstream)
+    if delay is None:
+        return await _send(api_url, params, "GET", upstream, headers=headers)
+
+    limiter = limiters.get(upstream)
+    primary = asyncio.ensure_future(_send(api_url, params, "GET", upstream, headers=headers))
+    hedge = winner = None
     try:
-        http_method = http_method.upper()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or limiter.in_flight >= limiter.limit:
+            winner = primary
+            return await primary
+
+        upstream_hedges.inc(upstream=upstream)
+        hedge = asyncio.ensure_future(_send(api_url, params, "GET", upstream, headers=headers))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        upstream_hedge_wins.inc(upstream=upstream)
+                    winner = task
+                    return task.result()
+        winner = primary
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if task is None:
+                continue
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None and task is not winner:
+                # A loser that finished anyway: release its spill file.
+                task.result()[1].close()
+
+
+async def _fetch(api_url: str, params: Optional[Dict[str, Any]], http_method: str) -> Dict[str, Any]:
+    upstream = resolve_upstream(api_url)
+    breaker = breakers.get(upstream)
+    policy = retry_policy_for(upstream)
+    can_retry = http_method in IDEMPOTENT_METHODS
+    key = make_cache_key(http_method, api_url, params) if http_method == "GET" else None
+    validated = validators.get(key) if key else None
+    session = auth.get(upstream)
+    hedged = http_method == "GET" and Config.for_upstream(upstream, "HEDGE_ENABLED")
+    reauthenticated = False
+    failure_recorded = False
+    delay = policy.base_delay
+    attempt = 1
+
+    def record_failure():
+        nonlocal failure_recorded
+        # The breaker counts failed calls, not attempts; a half-open probe always reports back.
+        if not failure_recorded or breaker.state == CircuitBreaker.HALF_OPEN:
+            breaker.record_failure()
+        failure_recorded = True
+
+    while True:
+        breaker.before_call()
+        headers = conditional_headers(validated)
+        if session is not None:
+            headers = {**(headers or {}), **await session.headers()}
+        try:
+            if hedged:
+                response, content = await _send_hedged(api_url, params, upstream, headers)
+            else:
+                response, content = await _send(api_url, params, http_method, upstream, headers=headers)
+        except httpx.TransportError as e:
+            record_failure()
+            if not can_retry or attempt >= policy.max_attempts:
+                raise
+            retry_after = None
+            failure = e
+            reason = str(e) or type(e).__name__
+        else:
+            with content:
+                if response.status_code >= 500:
+                    record_failure()
+                else:
+                    breaker.record_success()
+
+                if response.status_code == 401 and session is not None and not reauthenticated:
+                    # The token was revoked or expired early: log in again and replay once.
+                    session.invalidate(headers)
+                    reauthenticated = True
+                    continue
+
+                if not can_retry or attempt >= policy.max_attempts or response.status_code not in RETRYABLE_STATUS_CODES:
+                    if validated is not None and response.status_code == 304:
+                        return validated.body
+                    response.raise_for_status()
+                    # Spilled bodies are large by definition; decode them off the event loop.
+                    body = await asyncio.to_thread(content.decode) if content.spilled else content.decode()
+                    if key:
+                        validators.remember(key, response, body)
+                    return body
 
-        async with _api_semaphore:
-            async with httpx.AsyncClient(timeout=Config.TIME_OUT_SECONDS) as client:
-                response = await client.request(
-                    http_method,
-                    api_url,
-                    params=params if http_method == "GET" or http_method == "DELETE" else None,
-                    json=params if http_method in ["POST", "PUT", "PATCH"] else None,
-                    cookies=None,
-                    headers=None, #TODO: not implemented
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None and retry_after > policy.max_retry_after:
+                    response.raise_for_status()
+                failure = httpx.HTTPStatusError(
+                    f"{response.status_code} {response.reason_phrase}", request=response.request, response=response
                 )
+                reason = f"{response.status_code} {response.reason_phrase}"
 
-            log_requests_and_response(response)
-            response.raise_for_status()
-            return response.json()
+        delay = policy.next_delay(delay)
+        wait = max(delay, retry_after or 0.0)
+        left = remaining()
+        if left is not None and wait >= left:
+            logging.warning(f"Not retrying {http_method} {api_url}: {wait:.2f}s backoff exceeds the remaining budget ({max(left, 0.0):.2f}s): {reason}")
+            raise failure
+        blocked = breaker.blocked_for()
+        if blocked > wait:
+            # The breaker opened meanwhile; the retry would only be refused after the backoff.
+            raise CircuitOpenError(upstream, blocked)
+        logging.warning(f"Retrying {http_method} {api_url} in {wait:.2f}s (attempt {attempt}/{policy.max_attempts}): {reason}")
+        await asyncio.sleep(wait)
+        attempt += 1
+
+
+async def _fetch_shared(api_url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    key = make_cache_key("GET", api_url, params)
+    while True:
+        try:
+            # The shared call is shielded from its waiters, so bound it by the first caller's deadline too.
+            return await inflight.do(key, lambda: bounded(_fetch(api_url, params, "GET")))
+        except DeadlineExceeded:
+            left = remaining()
+            if left is not None and left <= 0:
+                raise
+            # The shared call ran out of the budget of the caller that started it, not ours: fetch again.
+
+
+async def _fetch_and_store(api_url: str, params: Optional[Dict[str, Any]], key: str, cache_ttl: float) -> Dict[str, Any]:
+    result = await _fetch_shared(api_url, params)
+    response_cache.set(key, result, cache_ttl)
+    validated = validators.get(key)
+    if validated is not None and validated.body is result:
+        disk_cache.put_in_background(key, result, cache_ttl, validated.etag, validated.last_modified)
+    else:
+        disk_cache.put_in_background(key, result, cache_ttl)
+    return result
+
+
+async def _fetch_cached(api_url: str, params: Optional[Dict[str, Any]], cache_ttl: float) -> Dict[str, Any]:
+    key = make_cache_key("GET", api_url, params)
+    cache_warmer.record(key, api_url, lambda: _fetch_and_store(api_url, params, key, cache_ttl))
+    entry = response_cache.get(key)
+    if entry is None:
+        stored = await disk_cache.get(key)
+        if stored is not None:
+            if validators.get(key) is None:
+                validators.put(key, stored.value, stored.etag, stored.last_modified)
+            if stored.stale_until > time.time():
+                entry = response_cache.set(key, stored.value, stored.expires_at - time.time())
+
+    if entry is not None:
+        if not entry.is_fresh(time.monotonic()):
+            response_cache.refresh_in_background(key, lambda: as_background(_fetch_and_store(api_url, params, key, cache_ttl)))
+        return entry.value
+
+    return await _fetch_and_store(api_url, params, key, cache_ttl)
+
+
+async def _dispatch(api_url: str, params: Optional[Dict[str, Any]], http_method: str, cache_ttl: float) -> Dict[str, Any]:
+    if http_method == "GET":
+        if cache_ttl > 0:
+            return await _fetch_cached(api_url, params, cache_ttl)
+        return await _fetch_shared(api_url, params)
+    return await _fetch(api_url, params, http_method)
+
+
+async def call_api(api_url: str, params: Dict[str, Any] = None, http_method: str = "GET",
+                   cache_ttl: Optional[float] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Call an upstream API and return the decoded JSON body, or an error dict.
+
+    GET responses are cached for cache_ttl seconds (Config.CACHE_TTL_SECONDS when None);
+    pass cache_ttl=0 to bypass the cache.
+    The call, including limiter waits and retries, must finish within timeout seconds
+    (REQUEST_TIMEOUT_SECONDS of the upstream when None) and within any enclosing deadline.
+    """
+    try:
+        http_method = http_method.upper()
+        if cache_ttl is None:
+            cache_ttl = Config.CACHE_TTL_SECONDS
+        if timeout is None:
+            timeout = Config.for_upstream(resolve_upstream(api_url), "REQUEST_TIMEOUT_SECONDS")
+
+        with deadline(timeout):
+            return await bounded(_dispatch(api_url, params, http_method, cache_ttl), timeout)
 
     except httpx.HTTPStatusError as e:
         error_message = f"API HTTP error ({api_url}): {e.response.status_code} {e.response.reason_phrase}"
@@ -68,3 +357,28 @@ async def call_api(api_url: str, params: Dict[str, Any] = None, http_method: str
         error_message = f"API request error ({api_url}): {e}"
         logging.error(error_message)
         return {"status": "error", "message": error_message}
+
+    except DeadlineExceeded as e:
+        error_message = f"API timeout ({api_url}): {e}"
+        logging.error(error_message)
+        return {"status": "error", "message": error_message}
+
+    except ResponseTooLarge as e:
+        error_message = f"API response too large ({api_url}): {e}"
+        logging.error(error_message)
+        return {"status": "error", "message": error_message}
+
+    except AuthError as e:
+        error_message = f"API authentication error ({api_url}): {e}"
+        logging.error(error_message)
+        return {"status": "error", "message": error_message}
+
+    except AdmissionRejected as e:
+        error_message = f"API busy ({api_url}): {e}"
+        logging.warning(error_message)
+        return {"status": "error", "message": error_message, "retryable": True, "retry_after": round(e.retry_after, 1)}
+
+    except CircuitOpenError as e:
+        error_message = f"API unavailable ({api_url}): {e}"
+        logging.error(error_message)
+        return {"status": "error", "message": error_message, "retryable": True, "retry_after": round(e.retry_after, 1)}
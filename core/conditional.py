@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+import httpx
+from config.config import Config
+
+
+class Validated(NamedTuple):
+    body: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ValidatorStore:
+    """Last body plus ETag / Last-Modified per GET key, used to revalidate with the upstream."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Validated]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Validated]:
+        validated = self._entries.get(key)
+        if validated is not None:
+            self._entries.move_to_end(key)
+        return validated
+
+    def put(self, key: str, body: Any, etag: Optional[str], last_modified: Optional[str]):
+        if not etag and not last_modified:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = Validated(body, etag, last_modified)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def remember(self, key: str, response: httpx.Response, body: Any):
+        self.put(key, body, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+def conditional_headers(validated: Optional[Validated]) -> Optional[Dict[str, str]]:
+    if validated is None:
+        return None
+    headers = {}
+    if validated.etag:
+        headers["If-None-Match"] = validated.etag
+    if validated.last_modified:
+        headers["If-Modified-Since"] = validated.last_modified
+    return headers
+
+
+validators = ValidatorStore(Config.CACHE_MAX_ENTRIES)
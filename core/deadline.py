@@ -0,0 +1,60 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The time budget of the current tool call or upstream request ran out."""
+
+    def __init__(self, budget: Optional[float] = None):
+        super().__init__(f"deadline of {budget:g}s exceeded" if budget else "deadline exceeded")
+        self.budget = budget
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """
+    Bound everything awaited inside the block to `seconds` from now.
+
+    Nested scopes can only shorten the enclosing deadline. Tasks created inside
+    the block (single-flight calls, hedges, background refreshes) inherit it.
+    """
+    current = _deadline.get()
+    if seconds is None or seconds <= 0:
+        yield current
+        return
+    expires_at = time.monotonic() + seconds
+    if current is not None:
+        expires_at = min(current, expires_at)
+    token = _deadline.set(expires_at)
+    try:
+        yield expires_at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when no deadline is set."""
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+async def bounded(awaitable: Awaitable[T], budget: Optional[float] = None) -> T:
+    """Await `awaitable`, cancelling it and raising DeadlineExceeded once the current deadline passes."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(budget)
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(budget) from None
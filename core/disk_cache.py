@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Set
+from config.config import Config
+from core.json_codec import dumps, loads
+from core.metrics import labels, metrics
+
+
+class StoredResponse(NamedTuple):
+    value: Any
+    expires_at: float
+    stale_until: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class DiskCache:
+    """
+    SQLite-backed response cache shared by every server process on the host.
+
+    The database runs in WAL mode so readers in other processes are not blocked by a
+    writer. Rows carry wall-clock expiry and HTTP validators, and the least recently
+    read rows are evicted once the stored bodies exceed max_bytes. A read only
+    refreshes its row's access time once that is TOUCH_AFTER_SECONDS old, so most
+    reads take no write lock. All SQLite work runs in a worker thread so the event
+    loop never blocks on disk I/O.
+    """
+
+    EVICT_CHECK_EVERY = 64
+    TOUCH_AFTER_SECONDS = 60.0
+
+    def __init__(self, path: str, max_bytes: int, stale_seconds: float, enabled: bool):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so startup does not pay for it.
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, body BLOB NOT NULL, expires_at REAL NOT NULL,"
+                " stale_until REAL NOT NULL, etag TEXT, last_modified TEXT,"
+                " size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT body, expires_at, stale_until, etag, last_modified, accessed_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[2] <= now and not (row[3] or row[4]):
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            if now - row[5] >= self.TOUCH_AFTER_SECONDS:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return StoredResponse(loads(row[0]), row[1], row[2], row[3], row[4])
+
+    def _put(self, key: str, value: Any, ttl: float, etag: Optional[str], last_modified: Optional[str]):
+        body = dumps(value)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, now + ttl, now + ttl + self.stale_seconds, etag, last_modified, len(body), now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_CHECK_EVERY == 0:
+                self._evict(conn)
+
+    def _get_prefix(self, prefix: str, exact: bool) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, body FROM responses WHERE key >= ? AND key <= ? AND expires_at > ?",
+                (prefix, prefix if exact else prefix + "\uffff", time.time()),
+            ).fetchall()
+        return {key: loads(body) for key, body in rows}
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._connection().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _claim(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE"
+                " SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def _release(self, name: str, owner: str):
+        with self._lock:
+            self._connection().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def _evict(self, conn: sqlite3.Connection):
+        conn.execute(
+            "DELETE FROM responses WHERE stale_until < ? AND etag IS NULL AND last_modified IS NULL", (time.time(),)
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        while total > target:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM responses WHERE key = ?", [(row[0],) for row in rows])
+            total -= sum(row[1] for row in rows)
+            self.evictions += len(rows)
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        if not self.enabled:
+            return None
+        try:
+            stored = await asyncio.to_thread(self._get, key)
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Disk cache read failed ({key}): {e}")
+            return None
+        if stored is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stored
+
+    async def put(self, key: str, value: Any, ttl: float):
+        """Store `value` now (rather than in the background), e.g. to share it with the other workers."""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._put, key, value, ttl, None, None)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f"Disk cache write failed ({key}): {e}")
+
+    async def get_prefix(self, prefix: str, exact: bool = False) -> Dict[str, Any]:
+        """Unexpired values of every key starting with `prefix` (or equal to it), outside the lookup stats."""
+        if not self.enabled:
+            return {}
+        try:
+            return await asyncio.to_thread(self._get_prefix, prefix, exact)
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Disk cache read failed ({prefix}*): {e}")
+            return {}
+
+    async def get_value(self, key: str) -> Optional[Any]:
+        """The unexpired value stored under `key`, outside the lookup stats."""
+        return (await self.get_prefix(key, exact=True)).get(key)
+
+    async def delete(self, key: str):
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._delete, key)
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache delete failed ({key}): {e}")
+
+    async def claim(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew the lease `name` for `ttl` seconds; False while another owner holds it.
+
+        Lets one of the processes sharing the cache do a periodic job (e.g. an index
+        refresh); the lease passes on once its holder stops renewing it.
+        """
+        if not self.enabled:
+            return True
+        try:
+            return await asyncio.to_thread(self._claim, name, owner, ttl)
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache lease failed ({name}): {e}")
+            return True
+
+    async def release(self, name: str, owner: str):
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._release, name, owner)
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache lease release failed ({name}): {e}")
+
+    def put_in_background(self, key: str, value: Any, ttl: float,
+                          etag: Optional[str] = None, last_modified: Optional[str] = None):
+        if not self.enabled:
+            return
+
+        async def write():
+            try:
+                await asyncio.to_thread(self._put, key, value, ttl, etag, last_modified)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logging.warning(f"Disk cache write failed ({key}): {e}")
+
+        task = asyncio.create_task(write())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+disk_cache = DiskCache(
+    os.path.join(Config.DISK_CACHE_DIR, "responses.sqlite3"),
+    max_bytes=Config.DISK_CACHE_MAX_BYTES,
+    stale_seconds=Config.CACHE_STALE_SECONDS,
+    enabled=Config.DISK_CACHE_ENABLED,
+)
+
+metrics.callback(
+    "mcp_disk_cache_lookups_total",
+    "On-disk response cache lookups by result",
+    lambda: {labels(result="hit"): disk_cache.hits, labels(result="miss"): disk_cache.misses},
+    metric_type="counter",
+)
@@ -0,0 +1,64 @@
+import httpx
+import logging
+from typing import Dict, Optional
+from config.config import Config
+from config.endpoints import UPSTREAMS, resolve_upstream
+
+
+class HttpClientRegistry:
+    """Long-lived, pooled httpx.AsyncClient per upstream."""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+
+    async def use_transport(self, transport: Optional[httpx.AsyncBaseTransport]):
+        """
+        Route every upstream through `transport` (e.g. httpx.ASGITransport for in-process
+        tests); None restores real connections. Existing clients are closed first.
+        """
+        await self.aclose()
+        self._transport = transport
+
+    def _build_client(self, upstream: str) -> httpx.AsyncClient:
+        http2 = Config.for_upstream(upstream, "HTTP2_ENABLED")
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logging.warning(f"HTTP/2 requested for {upstream} but 'h2' is not installed; using HTTP/1.1")
+                http2 = False
+
+        timeout = httpx.Timeout(
+            Config.for_upstream(upstream, "TIME_OUT_SECONDS"),
+            connect=Config.for_upstream(upstream, "HTTP_CONNECT_TIMEOUT_SECONDS"),
+        )
+        limits = httpx.Limits(
+            max_connections=Config.per_worker(Config.for_upstream(upstream, "HTTP_MAX_CONNECTIONS")),
+            max_keepalive_connections=Config.per_worker(Config.for_upstream(upstream, "HTTP_MAX_KEEPALIVE_CONNECTIONS")),
+            keepalive_expiry=Config.for_upstream(upstream, "HTTP_KEEPALIVE_EXPIRY_SECONDS"),
+        )
+        return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2, transport=self._transport)
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = self._build_client(upstream)
+            self._clients[upstream] = client
+        return client
+
+    def client_for(self, api_url: str) -> httpx.AsyncClient:
+        return self.get(resolve_upstream(api_url))
+
+    async def start(self):
+        for upstream in UPSTREAMS:
+            self.get(upstream.NAME)
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+http_clients = HttpClientRegistry()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from config.config import Config
+from core.disk_cache import disk_cache
+from core.metrics import labels, metrics
+from core.workers import WORKER_ID, multi_worker
+
+
+def _normalize(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class RecordIndex:
+    """
+    In-memory copy of a list endpoint keyed by primary id, with secondary indexes.
+
+    Each refresh diffs the fresh list against the current records and only touches
+    the secondary index entries of records that were added, changed or removed.
+
+    In multi-worker mode one worker at a time holds the refresh lease: it fetches
+    the list and shares it through the disk cache, and the other workers refresh
+    from that copy instead of fetching the list themselves.
+    """
+
+    def __init__(self, name: str, key_field: str, indexed_fields: List[str],
+                 fetch_items: Callable[[], Awaitable[List[Dict[str, Any]]]], refresh_seconds: float):
+        self.name = name
+        self.key_field = key_field
+        self.indexed_fields = indexed_fields
+        self.fetch_items = fetch_items
+        self.refresh_seconds = refresh_seconds
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._secondary: Dict[str, Dict[str, Set[str]]] = {field: {} for field in indexed_fields}
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_refreshed: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.last_refreshed is not None
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """True when the data is at most `max_age` seconds old (default: two refresh intervals)."""
+        if max_age is None:
+            max_age = self.refresh_seconds * 2
+        return self.ready and time.monotonic() - self.last_refreshed <= max_age
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        return self._records.get(str(key))
+
+    def find(self, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Records whose indexed fields equal every given value (case-insensitive)."""
+        keys: Optional[Set[str]] = None
+        for field, value in criteria.items():
+            matched = self._secondary[field].get(_normalize(value), set())
+            keys = set(matched) if keys is None else keys & matched
+            if not keys:
+                return []
+        if keys is None:
+            return []
+        return [self._records[key] for key in sorted(keys, key=lambda k: (len(k), k))]
+
+    def apply(self, items: List[Dict[str, Any]], age: float = 0.0) -> Dict[str, int]:
+        """Bring the index in line with `items`, fetched `age` seconds ago."""
+        fresh = {str(item[self.key_field]): item for item in items if self.key_field in item}
+        added = changed = removed = 0
+
+        for key in list(self._records):
+            if key not in fresh:
+                self._unindex(key, self._records.pop(key))
+                removed += 1
+
+        for key, item in fresh.items():
+            current = self._records.get(key)
+            if current == item:
+                continue
+            if current is None:
+                added += 1
+            else:
+                changed += 1
+                self._unindex(key, current)
+            self._records[key] = item
+            self._index(key, item)
+
+        self.last_refreshed = time.monotonic() - max(0.0, age)
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def _index(self, key: str, item: Dict[str, Any]):
+        for field in self.indexed_fields:
+            if field in item:
+                self._secondary[field].setdefault(_normalize(item[field]), set()).add(key)
+
+    def _unindex(self, key: str, item: Dict[str, Any]):
+        for field in self.indexed_fields:
+            if field not in item:
+                continue
+            bucket = self._secondary[field].get(_normalize(item[field]))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._secondary[field][_normalize(item[field])]
+
+    @property
+    def _shared_key(self) -> str:
+        return f"index:{self.name}"
+
+    async def _load(self) -> Tuple[List[Dict[str, Any]], float]:
+        """The list and its age in seconds."""
+        if not multi_worker():
+            return await self.fetch_items(), 0.0
+        ttl = self.refresh_seconds * 2
+        if not await disk_cache.claim(self._shared_key, WORKER_ID, ttl):
+            shared = await disk_cache.get_value(self._shared_key)
+            if shared is not None:
+                return shared["items"], time.time() - shared["fetched_at"]
+        # Lease holder, or no shared copy yet: fetch and share it.
+        items = await self.fetch_items()
+        await disk_cache.put(self._shared_key, {"items": items, "fetched_at": time.time()}, ttl)
+        return items, 0.0
+
+    async def refresh(self):
+        async with self._refresh_lock:
+            items, age = await self._load()
+            changes = self.apply(items, age)
+        logging.info(f"Index {self.name} refreshed: {len(self)} records, {changes}")
+
+    async def ensure_fresh(self):
+        """Refresh on demand when the background refresh is disabled or has fallen behind."""
+        if not self.is_fresh():
+            await self.refresh()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Index {self.name} refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if multi_worker():
+            await disk_cache.release(self._shared_key, WORKER_ID)
+
+
+class IndexRegistry:
+    def __init__(self):
+        self._indexes: Dict[str, RecordIndex] = {}
+
+    def register(self, index: RecordIndex) -> RecordIndex:
+        self._indexes[index.name] = index
+        return index
+
+    async def start(self):
+        if not Config.INDEX_ENABLED:
+            return
+        for index in self._indexes.values():
+            index.start()
+
+    async def aclose(self):
+        for index in self._indexes.values():
+            await index.stop()
+
+    def collect_sizes(self) -> Dict[tuple, float]:
+        return {labels(index=name): len(index) for name, index in self._indexes.items()}
+
+
+indexes = IndexRegistry()
+
+metrics.callback("mcp_index_records", "Records held in the in-memory index", indexes.collect_sizes)
@@ -0,0 +1,75 @@
+import json
+import logging
+from typing import Any, Union
+
+from config.config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StdlibCodec:
+    """json from the standard library; always available."""
+
+    name = "stdlib"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonCodec:
+    """
+    orjson: decodes bytes without an intermediate str and encodes straight to UTF-8.
+
+    Values orjson refuses to encode (integers beyond 64 bits, non-str keys) and
+    documents it refuses to decode go through the stdlib codec instead. Note that
+    orjson decodes integers beyond 64 bits as floats; set JSON_CODEC=stdlib if an
+    upstream sends such ids as numbers.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        self._fallback = StdlibCodec()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return self._fallback.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return orjson.dumps(value)
+        except orjson.JSONEncodeError:
+            return self._fallback.dumps(value)
+
+
+def _build(name: str):
+    name = name.lower()
+    if name in ("auto", "orjson"):
+        if orjson is not None:
+            return OrjsonCodec()
+        if name == "orjson":
+            logging.warning("JSON_CODEC=orjson but 'orjson' is not installed; using stdlib json")
+    elif name != "stdlib":
+        logging.warning(f"Unknown JSON_CODEC {name!r}; using stdlib json")
+    return StdlibCodec()
+
+
+json_codec = _build(Config.JSON_CODEC)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document; pass response.content rather than response.text."""
+    return json_codec.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode `value` as compact UTF-8 JSON; raises TypeError for values JSON cannot represent."""
+    return json_codec.dumps(value)
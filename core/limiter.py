@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from config.config import Config
+from core.metrics import labels, metrics, upstream_queue_wait, upstream_rejections
+from core.scheduler import FairQueue, QueueEntry, class_weights, current_flow, current_priority
+
+
+class AdmissionRejected(Exception):
+    """The upstream's wait queue is full or the queue wait ran too long; retry after `retry_after` seconds."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float):
+        super().__init__(f"{upstream} is overloaded ({reason}); retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one upstream.
+
+    The limit grows by roughly one slot per limit's worth of healthy responses while
+    the upstream is kept busy, and is multiplied by a backoff ratio on 5xx responses,
+    transport errors or latency well above the smoothed baseline. Latency runs up to
+    the response headers, so it tracks the upstream's queueing rather than body size.
+
+    Admission control: at most `max_queue` callers wait for a slot, each for at most
+    `max_queue_wait` seconds (0 disables either bound); anyone beyond that is rejected
+    at once with AdmissionRejected instead of queueing. Waiters are granted slots in
+    FairQueue order (weighted share per priority class, then fair share per MCP
+    session), not FIFO.
+    """
+
+    def __init__(self, name: str, initial: int, floor: int, ceiling: int,
+                 backoff_ratio: float, latency_tolerance: float, max_queue: int = 0, max_queue_wait: float = 0.0):
+        self.name = name
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.rejected = 0
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(min(max(initial, self.floor), self.ceiling))
+        self._in_flight = 0
+        self._queue = FairQueue(class_weights(name))
+        self._baseline_latency: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "sessions": self._queue.snapshot(),
+        }
+
+    def collect_sessions(self, field: str) -> Dict[tuple, float]:
+        return self._queue.collect(self.name, field)
+
+    def retry_after(self) -> float:
+        """Rough time for the current queue to drain at the current limit and latency."""
+        latency = self._baseline_latency or 0.1
+        return max(0.1, (self.queue_depth + 1) * latency / max(1, self.limit))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        upstream_rejections.inc(upstream=self.name, reason=reason)
+        return AdmissionRejected(self.name, reason.replace("_", " "), self.retry_after())
+
+    async def acquire(self):
+        if self._in_flight < self.limit and self.queue_depth == 0:
+            self._in_flight += 1
+            return
+        if self.max_queue and self.queue_depth >= self.max_queue:
+            raise self._reject("queue_full")
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        entry = self._queue.push(waiter, current_flow(), current_priority())
+        timer = None
+        if self.max_queue_wait:
+            timer = loop.call_later(self.max_queue_wait, self._expire, entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # Slot was handed over just before cancellation; pass it on. A waiter
+                # that expired in the queue (exception set) never held one.
+                self._in_flight -= 1
+                self._wake_waiters()
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._queue.leave(entry)
+
+    def _expire(self, entry: QueueEntry):
+        if not entry.waiter.done():
+            self._queue.leave(entry)
+            entry.waiter.set_exception(self._reject("queue_timeout"))
+
+    def release(self, latency: Optional[float], overloaded: bool):
+        """Free a slot; latency None (a cancelled request) leaves the limit and baseline alone."""
+        self._in_flight -= 1
+        if latency is not None:
+            self._adjust(latency, overloaded)
+        self._wake_waiters()
+
+    def slot(self) -> "_LimiterSlot":
+        return _LimiterSlot(self)
+
+    def _adjust(self, latency: float, overloaded: bool):
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+        too_slow = latency > self._baseline_latency * self.latency_tolerance
+
+        if not overloaded:
+            self._baseline_latency = 0.95 * self._baseline_latency + 0.05 * latency
+
+        previous = self.limit
+        if overloaded or too_slow:
+            self._limit = max(self.floor, self._limit * self.backoff_ratio)
+        elif self._in_flight + 1 >= self._limit / 2:
+            self._limit = min(self.ceiling, self._limit + 1 / self._limit)
+
+        if self.limit != previous:
+            logging.debug(f"Concurrency limit for {self.name}: {previous} -> {self.limit}")
+
+    def _wake_waiters(self):
+        while self._in_flight < self.limit:
+            entry = self._queue.pop()
+            if entry is None:
+                break
+            self._in_flight += 1
+            entry.waiter.set_result(None)
+
+
+class _LimiterSlot:
+    def __init__(self, limiter: AdaptiveLimiter):
+        self._limiter = limiter
+        self._start = 0.0
+        self.status_code: Optional[int] = None
+        self.latency: Optional[float] = None
+
+    def record(self, status_code: int, latency: Optional[float] = None):
+        """
+        Note the response status and, optionally, its latency up to the response headers.
+
+        Without one, the latency is the time the slot was held, body streaming
+        included, and a large list download reads as congestion.
+        """
+        self.status_code = status_code
+        self.latency = latency
+
+    async def __aenter__(self):
+        wait_start = time.monotonic()
+        await self._limiter.acquire()
+        self._start = time.monotonic()
+        upstream_queue_wait.observe(self._start - wait_start, upstream=self._limiter.name)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            # Cut short by a deadline or a winning hedge: the latency is truncated, not measured.
+            self._limiter.release(None, False)
+            return False
+        latency = self.latency if self.latency is not None else time.monotonic() - self._start
+        overloaded = exc_type is not None or (self.status_code is not None and self.status_code >= 500)
+        self._limiter.release(latency, overloaded)
+        return False
+
+
+class LimiterRegistry:
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, upstream: str) -> AdaptiveLimiter:
+        limiter = self._limiters.get(upstream)
+        if limiter is None:
+            max_queue = Config.for_upstream(upstream, "LIMITER_MAX_QUEUE")
+            limiter = AdaptiveLimiter(
+                upstream,
+                initial=Config.per_worker(Config.for_upstream(upstream, "API_MAX_CONCURRENT")),
+                floor=Config.for_upstream(upstream, "LIMITER_MIN_CONCURRENT"),
+                ceiling=Config.per_worker(Config.for_upstream(upstream, "LIMITER_MAX_CONCURRENT")),
+                backoff_ratio=Config.for_upstream(upstream, "LIMITER_BACKOFF_RATIO"),
+                latency_tolerance=Config.for_upstream(upstream, "LIMITER_LATENCY_TOLERANCE"),
+                max_queue=Config.per_worker(max_queue) if max_queue else 0,
+                max_queue_wait=Config.for_upstream(upstream, "LIMITER_MAX_QUEUE_WAIT_SECONDS"),
+            )
+            self._limiters[upstream] = limiter
+        return limiter
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: limiter.snapshot() for name, limiter in self._limiters.items()}
+
+    def collect(self, field: str) -> Dict[tuple, float]:
+        return {labels(upstream=name): getattr(limiter, field) for name, limiter in self._limiters.items()}
+
+    def collect_sessions(self, field: str) -> Dict[tuple, float]:
+        values = {}
+        for name, limiter in self._limiters.items():
+            values.update(limiter.collect_sessions(field))
+        return values
+
+
+limiters = LimiterRegistry()
+
+metrics.callback("mcp_upstream_in_flight", "Upstream requests currently in flight", lambda: limiters.collect("in_flight"))
+metrics.callback("mcp_upstream_queue_depth", "Calls waiting for an upstream concurrency slot", lambda: limiters.collect("queue_depth"))
+metrics.callback("mcp_upstream_concurrency_limit", "Current adaptive concurrency limit", lambda: limiters.collect("limit"))
+metrics.callback("mcp_session_queue_depth", "Calls of an MCP session waiting for an upstream slot", lambda: limiters.collect_sessions("queued"))
+metrics.callback("mcp_session_queue_waits_total", "Upstream slot waits per MCP session", lambda: limiters.collect_sessions("waits"), metric_type="counter")
+metrics.callback("mcp_session_queue_wait_seconds_total", "Time spent waiting for upstream slots per MCP session", lambda: limiters.collect_sessions("wait_seconds"), metric_type="counter")
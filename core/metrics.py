@@ -0,0 +1,207 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def labels(**kwargs) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_pairs: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(label_pairs) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _add_label(line: str, name: str, value: str) -> str:
+    """Add one label to a rendered sample line."""
+    series, sample = line.rsplit(" ", 1)
+    pair = f'{name}="{_escape(value)}"'
+    if series.endswith("}"):
+        return f"{series[:-1]},{pair}}} {sample}"
+    return f"{series}{{{pair}}} {sample}"
+
+
+def merge_expositions(texts: List[str]) -> str:
+    """
+    Merge text expositions of the same registry (one per worker process) into one.
+
+    Each metric keeps a single HELP/TYPE header with the samples of every input
+    grouped under it, as the exposition format requires.
+    """
+    families: Dict[str, List[str]] = {}
+    for text in texts:
+        family: List[str] = []
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = [line]
+            elif line.startswith("# TYPE "):
+                if len(family) == 1:
+                    family.append(line)
+            elif line:
+                family.append(line)
+    return "\n".join(line for family in families.values() for line in family) + "\n"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **label_values):
+        key = labels(**label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_pairs, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(label_pairs)} {value}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * bucket_count
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Cumulative-bucket histogram; quantiles are estimated by interpolating within buckets."""
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **label_values):
+        key = labels(**label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def quantile(self, q: float, **label_values) -> Optional[float]:
+        series = self._series.get(labels(**label_values))
+        return self._quantile(series, q) if series else None
+
+    def count(self, **label_values) -> int:
+        series = self._series.get(labels(**label_values))
+        return series.count if series else 0
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> Optional[float]:
+        if series.count == 0:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for index, count in enumerate(series.counts):
+            if count and cumulative + count >= rank:
+                if index >= len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        quantile_lines = []
+        for label_pairs, series in sorted(self._series.items(), key=lambda item: item[0]):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(label_pairs, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(label_pairs, ('le', '+Inf'))} {series.count}")
+            lines.append(f"{self.name}_sum{_format_labels(label_pairs)} {series.total}")
+            lines.append(f"{self.name}_count{_format_labels(label_pairs)} {series.count}")
+            for q in QUANTILES:
+                value = self._quantile(series, q)
+                quantile_lines.append(f"{self.name}_quantile{_format_labels(label_pairs, ('quantile', str(q)))} {value}")
+
+        lines.append(f"# HELP {self.name}_quantile Estimated p50/p90/p99 of {self.name}")
+        lines.append(f"# TYPE {self.name}_quantile gauge")
+        return lines + quantile_lines
+
+
+class MetricCallback:
+    """Gauge or counter whose values are read from live state at scrape time."""
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], Dict[Labels, float]], metric_type: str):
+        self.name = name
+        self.help_text = help_text
+        self.collect = collect
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for label_pairs, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(label_pairs)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def callback(self, name: str, help_text: str, collect: Callable[[], Dict[Labels, float]],
+                 metric_type: str = "gauge") -> MetricCallback:
+        return self._register(MetricCallback(name, help_text, collect, metric_type))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, worker: Optional[str] = None) -> str:
+        """Text exposition; every sample is labelled worker="<worker>" when one is given."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        if worker is not None:
+            lines = [line if line.startswith("#") else _add_label(line, "worker", worker) for line in lines]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+tool_calls = metrics.counter("mcp_tool_calls_total", "Tool invocations")
+tool_errors = metrics.counter("mcp_tool_errors_total", "Tool invocations that returned an error")
+tool_latency = metrics.histogram("mcp_tool_latency_seconds", "Tool call latency in seconds")
+upstream_latency = metrics.histogram("mcp_upstream_request_latency_seconds", "Upstream request latency in seconds")
+upstream_responses = metrics.counter("mcp_upstream_responses_total", "Upstream responses by status code")
+upstream_queue_wait = metrics.histogram("mcp_upstream_queue_wait_seconds", "Time spent waiting for an upstream concurrency slot")
+upstream_rejections = metrics.counter("mcp_upstream_rejected_total", "Calls rejected by admission control (queue full or queue wait exceeded)")
+upstream_hedges = metrics.counter("mcp_upstream_hedged_requests_total", "Hedged upstream GETs sent after the primary exceeded the hedge delay")
+upstream_hedge_wins = metrics.counter("mcp_upstream_hedge_wins_total", "Hedged upstream GETs that answered before the primary")
+upstream_spilled = metrics.counter("mcp_upstream_spilled_responses_total", "Upstream bodies over RESPONSE_SPILL_BYTES spooled to a temp file")
+upstream_oversized = metrics.counter("mcp_upstream_oversized_responses_total", "Upstream bodies rejected for exceeding MAX_RESPONSE_BYTES")
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from config.config import Config
+from core.call_api import call_api
+from core.disk_cache import DiskCache, disk_cache
+from core.json_codec import dumps, loads
+from core.projection import Where, filter_items, filter_key, project_items
+from core.workers import multi_worker
+
+
+class ListSnapshotStore:
+    """
+    Short-lived server-side copies of (filtered) list responses, sliced by cursor.
+
+    With a `shared` disk cache (multi-worker mode) every snapshot is also written
+    there, so whichever worker receives the next cursor can resolve it.
+    """
+
+    PREFIX = "snapshot:"
+
+    def __init__(self, ttl: float, max_snapshots: int, shared: Optional[DiskCache] = None):
+        self.ttl = ttl
+        self.max_snapshots = max_snapshots
+        self.shared = shared
+        self._snapshots: "OrderedDict[str, Tuple[float, List[Any], Any]]" = OrderedDict()
+
+    async def put(self, items: List[Any], query: Any = None) -> str:
+        """Keep `items`; `query` records what selected them (e.g. the filter) for get() callers to check."""
+        snapshot_id = uuid.uuid4().hex[:16]
+        self._keep(snapshot_id, items, query)
+        if self.shared is not None:
+            await self.shared.put(self.PREFIX + snapshot_id, {"items": items, "query": query}, self.ttl)
+        return snapshot_id
+
+    async def get(self, snapshot_id: str) -> Optional[Tuple[List[Any], Any]]:
+        self._purge()
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is not None:
+            return snapshot[1:]
+        if self.shared is None:
+            return None
+        stored = await self.shared.get_value(self.PREFIX + snapshot_id)
+        if stored is None:
+            return None
+        # Issued by another worker; keep a local copy for the rest of the walk.
+        items, query = stored["items"], _tuples(stored["query"])
+        self._keep(snapshot_id, items, query)
+        return items, query
+
+    def _keep(self, snapshot_id: str, items: List[Any], query: Any):
+        self._purge()
+        self._snapshots[snapshot_id] = (time.monotonic() + self.ttl, items, query)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._snapshots:
+            snapshot_id, (expires_at, _, _) = next(iter(self._snapshots.items()))
+            if expires_at > now:
+                break
+            del self._snapshots[snapshot_id]
+
+
+def _tuples(value: Any) -> Any:
+    """Undo the JSON round trip of a snapshot query: arrays back to tuples."""
+    return tuple(_tuples(item) for item in value) if isinstance(value, list) else value
+
+
+def encode_cursor(offset: int, snapshot_id: Optional[str] = None) -> str:
+    payload = {"o": offset}
+    if snapshot_id:
+        payload["s"] = snapshot_id
+    return base64.urlsafe_b64encode(dumps(payload)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload["o"]), payload.get("s")
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return Config.LIST_PAGE_DEFAULT_LIMIT
+    return max(1, min(int(limit), Config.LIST_PAGE_MAX_LIMIT))
+
+
+async def paginate_list(api_url: str, list_key: str, cache_ttl: float, limit: Optional[int] = None,
+                        cursor: Optional[str] = None, upstream_paging: bool = False,
+                        fields: Optional[List[str]] = None, where: Optional[Where] = None,
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Return one page of a list endpoint as {list_key: [...], "next_cursor": str | None}.
+
+    With upstream_paging the upstream is asked for offset/limit pages directly; otherwise
+    the full list is fetched once and kept server-side so later cursors slice the same data.
+    `where` filters items before paging (per upstream page when upstream_paging is set)
+    and `fields` projects the items of the returned page. A snapshot cursor only
+    continues the listing it was issued for, so it must come with the same `where`.
+    """
+    limit = clamp_limit(limit)
+    try:
+        offset, snapshot_id = decode_cursor(cursor) if cursor else (0, None)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    if upstream_paging:
+        result = await call_api(api_url=api_url, params={"offset": offset, "limit": limit},
+                                http_method="GET", cache_ttl=cache_ttl, timeout=timeout)
+        if result.get("status") == "error":
+            return result
+        items = result.get(list_key, [])
+        total = result.get("total")
+        has_more = offset + len(items) < total if isinstance(total, int) else len(items) >= limit
+        page = {
+            list_key: project_items(filter_items(items, where), fields),
+            "next_cursor": encode_cursor(offset + len(items)) if has_more else None,
+        }
+        if isinstance(total, int):
+            page["total"] = total
+        return page
+
+    if snapshot_id:
+        snapshot = await list_snapshots.get(snapshot_id)
+        if snapshot is None:
+            return {"status": "error", "message": "Cursor expired; restart the listing without a cursor"}
+        items, query = snapshot
+        if query != filter_key(where):
+            return {"status": "error", "message": "Cursor belongs to a listing with a different 'where'; "
+                                                  "pass the same 'where' or restart the listing without a cursor"}
+    else:
+        result = await call_api(api_url=api_url, http_method="GET", cache_ttl=cache_ttl, timeout=timeout)
+        if result.get("status") == "error":
+            return result
+        items = filter_items(result.get(list_key, []), where)
+        snapshot_id = await list_snapshots.put(items, filter_key(where)) if len(items) > limit else None
+
+    end = offset + limit
+    return {
+        list_key: project_items(items[offset:end], fields),
+        "next_cursor": encode_cursor(end, snapshot_id) if end < len(items) else None,
+        "total": len(items),
+    }
+
+
+async def fetch_all_items(api_url: str, list_key: str, upstream_paging: bool = False) -> List[Any]:
+    """Fetch every item of a list endpoint fresh from the upstream, walking pages if it pages."""
+    if not upstream_paging:
+        result = await call_api(api_url=api_url, http_method="GET", cache_ttl=0)
+        if result.get("status") == "error":
+            raise RuntimeError(result.get("message"))
+        return result.get(list_key, [])
+
+    items: List[Any] = []
+    limit = Config.LIST_PAGE_MAX_LIMIT
+    while True:
+        result = await call_api(api_url=api_url, params={"offset": len(items), "limit": limit},
+                                http_method="GET", cache_ttl=0)
+        if result.get("status") == "error":
+            raise RuntimeError(result.get("message"))
+        page = result.get(list_key, [])
+        items.extend(page)
+        total = result.get("total")
+        if not page or (len(items) >= total if isinstance(total, int) else len(page) < limit):
+            return items
+
+
+list_snapshots = ListSnapshotStore(Config.LIST_SNAPSHOT_TTL_SECONDS, Config.LIST_SNAPSHOT_MAX_ENTRIES,
+                                   shared=disk_cache if multi_worker() else None)
@@ -0,0 +1,85 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel
+
+Where = Dict[str, Union[str, int, float, bool]]
+
+class QueryError(ValueError):
+    pass
+
+
+def check_fields(model: Type[BaseModel], names: Iterable[str], arg_name: str):
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        allowed = ", ".join(model.model_fields)
+        raise QueryError(f"Unknown field(s) in {arg_name}: {unknown}; {model.__name__} allows: {allowed}")
+
+
+def normalize(value: Any) -> str:
+    """Values as their JSON text, so 1 and 1.0 and "1" agree, and True and "true"."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if value is None else str(value)
+
+
+_BOOLEANS = {"true": True, "1": True, "false": False, "0": False}
+
+
+def _coerce(expected: Any, actual: Union[bool, int, float]) -> Any:
+    """
+    `expected` converted to the type of the item's boolean or numeric `actual` value,
+    or None when it has no such form. Booleans and 0/1 flags are interchangeable:
+    the upstreams store some flags (e.g. Template.valid) as ints.
+    """
+    if isinstance(actual, bool):
+        return _BOOLEANS.get(normalize(expected).lower())
+    if isinstance(expected, bool):
+        return int(expected)
+    if isinstance(expected, (int, float)):
+        return expected
+    text = str(expected).strip().lower()
+    if text in ("true", "false"):
+        return int(text == "true")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def matches(item: Dict[str, Any], where: Where) -> bool:
+    """Equality match per field, by the field's type; a string value ending in '*' is a prefix match."""
+    for name, expected in where.items():
+        actual = item.get(name)
+        if isinstance(expected, str) and expected.endswith("*"):
+            if not normalize(actual).startswith(expected[:-1]):
+                return False
+        elif isinstance(actual, (bool, int, float)):
+            if _coerce(expected, actual) != actual:
+                return False
+        elif normalize(actual) != normalize(expected):
+            return False
+    return True
+
+
+def filter_key(where: Optional[Where]) -> Tuple[Tuple[str, str], ...]:
+    """Normalized, order-independent form of a filter, e.g. to tell whether two filters select the same items."""
+    return tuple(sorted((name, normalize(value)) for name, value in (where or {}).items()))
+
+
+def filter_items(items: List[Dict[str, Any]], where: Optional[Where]) -> List[Dict[str, Any]]:
+    if not where:
+        return items
+    return [item for item in items if matches(item, where)]
+
+
+def project_item(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not fields or not isinstance(item, dict) or item.get("status") == "error":
+        return item
+    return {name: item[name] for name in fields if name in item}
+
+
+def project_items(items: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    if not fields:
+        return items
+    return [project_item(item, fields) for item in items]
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from config.config import Config
+from core.deadline import remaining
+from core.limiter import AdmissionRejected
+from core.metrics import labels, metrics, upstream_rejections
+from core.resilience import parse_retry_after
+
+
+def _header_number(headers: httpx.Headers, *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value.split(",")[0].split(";")[0].strip())
+        except ValueError:
+            continue
+    return None
+
+
+def parse_rate_limit_headers(headers: httpx.Headers) -> Optional[Tuple[Optional[float], float, float]]:
+    """
+    Return (limit, remaining, reset_seconds) from RateLimit-* or X-RateLimit-* headers,
+    or None when remaining/reset are absent. limit is None when not advertised.
+
+    Reset values that look like a Unix timestamp are converted to seconds from now.
+    """
+    limit = _header_number(headers, "RateLimit-Limit", "X-RateLimit-Limit")
+    left = _header_number(headers, "RateLimit-Remaining", "X-RateLimit-Remaining")
+    reset = _header_number(headers, "RateLimit-Reset", "X-RateLimit-Reset")
+    if left is None or reset is None:
+        return None
+    if reset > 1_000_000_000:
+        reset -= time.time()
+    return limit, max(0.0, left), max(0.0, reset)
+
+
+class TokenBucket:
+    """
+    Client-side request rate limit for one upstream.
+
+    Tokens refill at `rate` per second up to `burst` (rate 0: no configured limit,
+    only what the quota headers teach). A caller that finds the bucket empty
+    reserves a token anyway and sleeps until it is due, so bursts are smoothed into
+    a steady stream; only a wait longer than the caller's deadline is rejected. A
+    pause or a lower rate drops the outstanding reservations, and callers sleeping
+    on one queue again when they wake.
+
+    Quota headers adapt the bucket: Limit over the longest Reset seen (the window)
+    caps the rate, Remaining caps the tokens, and an exhausted quota or a 429
+    Retry-After pauses the bucket until the upstream resets.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, workers: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.workers = max(1, workers)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._quota_rate: Optional[float] = None
+        self._quota_until = 0.0
+        self._window = 0.0
+        self._paused_until = 0.0
+        # Bumped whenever the schedule sleeping callers reserved against gets slower.
+        self._generation = 0
+        self.delayed = 0
+        self.delay_seconds = 0.0
+
+    @property
+    def effective_rate(self) -> float:
+        """Requests per second allowed now; 0 means unlimited."""
+        if self._quota_rate is not None and time.monotonic() < self._quota_until:
+            return min(self.rate, self._quota_rate) if self.rate > 0 else self._quota_rate
+        return self.rate
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.effective_rate
+        if rate <= 0:
+            self._tokens = float(self.burst)
+        elif now > self._updated:
+            # _updated lies ahead during a pause: nothing accrues until it ends.
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * rate)
+        self._updated = max(now, self._updated)
+
+    def _reschedule(self):
+        """Drop every outstanding reservation; sleeping callers queue again when they wake."""
+        self._tokens = max(self._tokens, 0.0)
+        self._generation += 1
+
+    async def _sleep(self, wait: float):
+        left = remaining()
+        if left is not None and wait > left:
+            upstream_rejections.inc(upstream=self.name, reason="rate_limit")
+            raise AdmissionRejected(self.name, "rate limit", wait)
+        self.delay_seconds += wait
+        await asyncio.sleep(wait)
+
+    async def acquire(self):
+        delayed = False
+        while True:
+            paused = self._paused_until - time.monotonic()
+            if paused > 0:
+                wait = paused
+            else:
+                self._refill()
+                self._tokens -= 1
+                if self._tokens >= 0:
+                    return
+                wait = -self._tokens / self.effective_rate
+            if not delayed:
+                self.delayed += 1
+                delayed = True
+
+            generation = self._generation
+            try:
+                await self._sleep(wait)
+            except (asyncio.CancelledError, AdmissionRejected):
+                if paused <= 0 and generation == self._generation:
+                    self._tokens += 1
+                raise
+            if paused <= 0 and generation == self._generation:
+                return
+            # Paused or slowed down while we slept: the reservation was dropped.
+
+    async def wait_unpaused(self):
+        """Sleep out a pause that began after the caller's token was granted."""
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            await self._sleep(paused)
+
+    def observe(self, response: httpx.Response):
+        """Adapt to the upstream's quota headers and 429 Retry-After."""
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after:
+                self.pause(retry_after)
+                return
+
+        quota = parse_rate_limit_headers(response.headers)
+        if quota is None:
+            return
+        limit, left, reset = quota
+        self._refill()
+        before = self.effective_rate
+        # The quota is shared by every worker process; each one keeps to its share.
+        self._window = max(self._window, reset)
+        if limit and self._window > 0:
+            self._quota_rate = limit / self.workers / self._window
+            # Forget the learned rate if the upstream stops sending quota headers.
+            self._quota_until = time.monotonic() + 10 * self._window
+        after = self.effective_rate
+        if after > 0 and (before <= 0 or after < before):
+            self._reschedule()
+        if left <= 0:
+            if reset > 0:
+                self.pause(reset)
+            return
+        self._tokens = min(self._tokens, left / self.workers)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (upstream asked us to slow down)."""
+        self._refill()
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._reschedule()
+        # Start the next window empty, so it is paced rather than spent in one burst.
+        self._tokens = 0.0
+        self._updated = self._paused_until
+        logging.warning(f"Rate limit for {self.name}: pausing {seconds:.1f}s")
+
+    def snapshot(self) -> dict:
+        return {
+            "rate": self.rate,
+            "effective_rate": round(self.effective_rate, 3),
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "delayed": self.delayed,
+            "delay_seconds": round(self.delay_seconds, 3),
+        }
+
+
+class RateLimitRegistry:
+    """
+    TokenBucket per upstream, split across workers.
+
+    Upstreams with RATE_LIMIT_PER_SECOND > 0 get a bucket up front; the others get
+    one from the first response carrying quota headers (or a 429), unless
+    RATE_LIMIT_FOLLOW_HEADERS is off.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+
+    def _build(self, upstream: str, rate: float) -> TokenBucket:
+        return TokenBucket(
+            upstream,
+            rate=rate / max(1, Config.SERVER_WORKERS),
+            burst=Config.per_worker(Config.for_upstream(upstream, "RATE_LIMIT_BURST")),
+            workers=Config.SERVER_WORKERS,
+        )
+
+    def get(self, upstream: str) -> Optional[TokenBucket]:
+        if upstream not in self._buckets:
+            rate = Config.for_upstream(upstream, "RATE_LIMIT_PER_SECOND")
+            self._buckets[upstream] = self._build(upstream, rate) if rate > 0 else None
+        return self._buckets[upstream]
+
+    def observe(self, upstream: str, response: httpx.Response):
+        """Feed a response's quota headers to the upstream's bucket, creating it if needed."""
+        bucket = self.get(upstream)
+        if bucket is None:
+            if not Config.for_upstream(upstream, "RATE_LIMIT_FOLLOW_HEADERS"):
+                return
+            if response.status_code != 429 and parse_rate_limit_headers(response.headers) is None:
+                return
+            bucket = self._buckets[upstream] = self._build(upstream, 0)
+            logging.info(f"Rate limit for {upstream}: following the upstream's quota headers")
+        bucket.observe(response)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: bucket.snapshot() for name, bucket in self._buckets.items() if bucket is not None}
+
+    def collect(self, field: str) -> Dict[tuple, float]:
+        return {labels(upstream=name): getattr(bucket, field) for name, bucket in self._buckets.items() if bucket is not None}
+
+
+rate_limits = RateLimitRegistry()
+
+metrics.callback("mcp_upstream_rate_limit_tokens", "Tokens left in the upstream rate-limit bucket (negative: reserved ahead)", lambda: rate_limits.collect("tokens"))
+metrics.callback("mcp_upstream_rate_limit_rate", "Current upstream request rate limit (req/s)", lambda: rate_limits.collect("effective_rate"))
+metrics.callback("mcp_upstream_rate_limit_delay_seconds_total", "Time calls were delayed by the rate limit", lambda: rate_limits.collect("delay_seconds"), metric_type="counter")
@@ -0,0 +1,148 @@
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from config.config import Config
+from core.metrics import labels, metrics
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Circuit open for {upstream}; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one upstream.
+
+    Opens after `failure_threshold` consecutive failures, fails fast for
+    `reset_timeout` seconds, then lets a single probe through (half-open).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+    def blocked_for(self) -> float:
+        """Seconds before before_call() would let a call through; 0 if it would now."""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            return max(0.0, self._opened_at + self.reset_timeout - now)
+        if self.state == self.HALF_OPEN and self._probe_started_at is not None:
+            return max(0.0, self._probe_started_at + self.reset_timeout - now)
+        return 0.0
+
+    def before_call(self):
+        if self.state == self.CLOSED:
+            return
+
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout - now
+            if remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            self._transition(self.HALF_OPEN)
+
+        # Half-open: one probe at a time. A probe that never reported back
+        # (e.g. cancelled) is given up on after reset_timeout.
+        if self._probe_started_at is not None and now - self._probe_started_at < self.reset_timeout:
+            raise CircuitOpenError(self.name, self._probe_started_at + self.reset_timeout - now)
+        self._probe_started_at = now
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logging.warning(f"Circuit breaker for {self.name}: {self.state} -> {state}")
+        self.state = state
+        self._probe_started_at = None
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures}
+
+
+class RetryPolicy:
+    """Bounded retries with decorrelated jitter backoff."""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, max_retry_after: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def next_delay(self, previous_delay: float) -> float:
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous_delay * 3)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, upstream: str) -> CircuitBreaker:
+        breaker = self._breakers.get(upstream)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                upstream,
+                failure_threshold=Config.for_upstream(upstream, "BREAKER_FAILURE_THRESHOLD"),
+                reset_timeout=Config.for_upstream(upstream, "BREAKER_RESET_TIMEOUT_SECONDS"),
+            )
+            self._breakers[upstream] = breaker
+        return breaker
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+    def collect_open(self) -> Dict[tuple, float]:
+        return {labels(upstream=name): int(breaker.state != CircuitBreaker.CLOSED) for name, breaker in self._breakers.items()}
+
+
+def retry_policy_for(upstream: str) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=Config.for_upstream(upstream, "RETRY_MAX_ATTEMPTS"),
+        base_delay=Config.for_upstream(upstream, "RETRY_BASE_DELAY_SECONDS"),
+        max_delay=Config.for_upstream(upstream, "RETRY_MAX_DELAY_SECONDS"),
+        max_retry_after=Config.for_upstream(upstream, "RETRY_AFTER_MAX_SECONDS"),
+    )
+
+
+breakers = BreakerRegistry()
+
+metrics.callback("mcp_upstream_circuit_open", "1 while the upstream circuit breaker is open or half-open", breakers.collect_open)
@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config.config import Config
+from core.metrics import labels
+
+INTERACTIVE = 0     # single-record lookups a user is waiting on
+BULK = 1            # list scans and batch fetches
+BACKGROUND = 2      # index refreshes, stale-while-revalidate, warming
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", BACKGROUND: "background"}
+BACKGROUND_FLOW = "background"
+
+_flow: ContextVar[str] = ContextVar("flow", default=BACKGROUND_FLOW)
+_priority: ContextVar[int] = ContextVar("priority", default=BACKGROUND)
+
+
+@contextmanager
+def flow_context(flow: str, priority: int):
+    """Attribute upstream calls made inside the block to `flow` (an MCP session) at `priority`."""
+    flow_token = _flow.set(flow)
+    priority_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(priority_token)
+        _flow.reset(flow_token)
+
+
+async def as_background(awaitable):
+    """Run `awaitable` (inside its own task) as background work, whoever triggered it."""
+    _flow.set(BACKGROUND_FLOW)
+    _priority.set(BACKGROUND)
+    return await awaitable
+
+
+def current_flow() -> str:
+    return _flow.get()
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class FlowStats:
+    __slots__ = ("queued", "waits", "wait_seconds", "max_wait")
+
+    def __init__(self):
+        self.queued = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+
+class QueueEntry:
+    __slots__ = ("tag", "seq", "waiter", "flow", "priority", "enqueued_at", "left")
+
+    def __init__(self, tag: float, seq: int, waiter: asyncio.Future, flow: str, priority: int):
+        self.tag = tag
+        self.seq = seq
+        self.waiter = waiter
+        self.flow = flow
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.left = False
+
+    def __lt__(self, other: "QueueEntry") -> bool:
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+def class_weights(upstream: str) -> Dict[int, float]:
+    """Share of the upstream's slots each priority class gets while all of them are queued."""
+    return {
+        priority: max(0.001, Config.for_upstream(upstream, f"SCHEDULER_WEIGHT_{name.upper()}"))
+        for priority, name in PRIORITY_NAMES.items()
+    }
+
+
+class FairQueue:
+    """
+    Wait queue for one upstream: weighted fair queuing between priority classes,
+    start-time fair queuing between flows within a class.
+
+    Classes take turns in proportion to their weights (8:2:1 by default), so
+    interactive calls go first most of the time but a steady stream of them
+    cannot starve list scans or background refreshes. Within a class each flow's
+    requests get virtual start tags one apart, so a session that queues hundreds
+    of calls only gets its turn as often as any other busy session instead of
+    draining first. Cancelled or expired waiters are skipped lazily when popped.
+    """
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, max_tracked_flows: int = 256):
+        self.weights = weights or {priority: 1.0 for priority in PRIORITY_NAMES}
+        self._heaps: Dict[int, List[QueueEntry]] = {}
+        self._queued: Dict[int, int] = {}
+        # Start-time fair queuing twice over: flows within a class, classes within the queue.
+        self._finish: Dict[Tuple[int, str], float] = {}
+        self._flow_time: Dict[int, float] = {}
+        self._class_finish: Dict[int, float] = {}
+        self._class_time = 0.0
+        self._seq = itertools.count()
+        self._pending = 0
+        self.max_tracked_flows = max_tracked_flows
+        self.flows: "OrderedDict[str, FlowStats]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def push(self, waiter: asyncio.Future, flow: str, priority: int) -> QueueEntry:
+        if self._pending == 0:
+            # Idle queue: drop skipped entries and old tags so returning flows start level.
+            self._heaps.clear()
+            self._queued.clear()
+            self._finish.clear()
+            self._flow_time.clear()
+            self._class_finish.clear()
+            self._class_time = 0.0
+        if not self._queued.get(priority):
+            # Anything left in an idle class's heap was skipped; nor does the class bank turns for later.
+            self._heaps.pop(priority, None)
+            self._class_finish[priority] = max(self._class_finish.get(priority, 0.0), self._class_time)
+        start = max(self._flow_time.get(priority, 0.0), self._finish.get((priority, flow), 0.0))
+        self._finish[(priority, flow)] = start + 1.0
+        entry = QueueEntry(start, next(self._seq), waiter, flow, priority)
+        heapq.heappush(self._heaps.setdefault(priority, []), entry)
+        self._queued[priority] = self._queued.get(priority, 0) + 1
+        self._pending += 1
+        self._stats(flow).queued += 1
+        return entry
+
+    def pop(self) -> Optional[QueueEntry]:
+        """Next live waiter: the class whose turn it is, then virtual-time order within it; or None."""
+        while True:
+            live = [priority for priority, queued in self._queued.items() if queued]
+            if not live:
+                return None
+            priority = min(live, key=lambda p: (self._class_finish[p], p))
+            entry = heapq.heappop(self._heaps[priority])
+            if entry.waiter.done():
+                self.leave(entry)
+                continue
+            self._class_time = self._class_finish[priority]
+            self._class_finish[priority] += 1.0 / self.weights.get(priority, 1.0)
+            self._flow_time[priority] = entry.tag
+            self.leave(entry)
+            return entry
+
+    def leave(self, entry: QueueEntry):
+        """Account for an entry leaving the queue (granted, cancelled or rejected); idempotent."""
+        if entry.left:
+            return
+        entry.left = True
+        self._pending -= 1
+        self._queued[entry.priority] -= 1
+        wait = time.monotonic() - entry.enqueued_at
+        stats = self._stats(entry.flow)
+        stats.queued -= 1
+        stats.waits += 1
+        stats.wait_seconds += wait
+        stats.max_wait = max(stats.max_wait, wait)
+
+    def _stats(self, flow: str) -> FlowStats:
+        stats = self.flows.get(flow)
+        if stats is None:
+            stats = self.flows[flow] = FlowStats()
+            while len(self.flows) > self.max_tracked_flows:
+                oldest, oldest_stats = next(iter(self.flows.items()))
+                if oldest_stats.queued:
+                    break
+                del self.flows[oldest]
+        else:
+            self.flows.move_to_end(flow)
+        return stats
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            flow: {
+                "queued": stats.queued,
+                "waits": stats.waits,
+                "avg_wait": round(stats.wait_seconds / stats.waits, 4) if stats.waits else 0.0,
+                "max_wait": round(stats.max_wait, 4),
+            }
+            for flow, stats in self.flows.items()
+        }
+
+    def collect(self, upstream: str, field: str) -> Dict[tuple, float]:
+        return {
+            labels(upstream=upstream, session=flow): getattr(stats, field)
+            for flow, stats in self.flows.items()
+            if field != "queued" or stats.queued
+        }
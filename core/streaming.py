@@ -0,0 +1,263 @@
+import codecs
+import json
+import re
+import tempfile
+from typing import IO, Any, List, Optional
+
+import httpx
+
+from core.json_codec import loads
+
+READ_CHUNK_BYTES = 64 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class ResponseTooLarge(Exception):
+    """The upstream body is larger than MAX_RESPONSE_BYTES."""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"response body of {size}+ bytes exceeds the {limit} byte limit")
+        self.size = size
+        self.limit = limit
+
+
+class ResponseBody:
+    """
+    Upstream response body read under a size cap.
+
+    Up to `spill_bytes` the chunks stay in memory; a larger body is written to an
+    anonymous temporary file as it arrives, and decode() then parses it from the
+    file with IncrementalDecoder instead of loading the raw bytes.
+    """
+
+    def __init__(self, spill_bytes: int):
+        self.spill_bytes = spill_bytes
+        self.size = 0
+        self.oversized = False
+        self._chunks: List[bytes] = []
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self._file is None and 0 < self.spill_bytes < self.size:
+            self._file = tempfile.TemporaryFile()
+            for buffered in self._chunks:
+                self._file.write(buffered)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def head(self, limit: int) -> bytes:
+        """The first `limit` bytes (all of them when limit <= 0), for logging."""
+        if self._file is not None:
+            self._file.seek(0)
+            return self._file.read(limit if limit > 0 else -1)
+        if limit <= 0:
+            return b"".join(self._chunks)
+        head, size = [], 0
+        for chunk in self._chunks:
+            head.append(chunk[:limit - size])
+            size += len(head[-1])
+            if size >= limit:
+                break
+        return b"".join(head)
+
+    def decode(self) -> Any:
+        if self._file is None:
+            return loads(b"".join(self._chunks))
+        self._file.seek(0)
+        return IncrementalDecoder(self._file).decode()
+
+    def close(self):
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ResponseBody":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+async def read_body(response: httpx.Response, max_bytes: int, spill_bytes: int) -> ResponseBody:
+    """
+    Read a streamed response into a ResponseBody and close the response.
+
+    Once the body (by Content-Length, or as received) exceeds `max_bytes`, reading
+    stops and an empty body flagged `oversized` is returned; max_bytes <= 0 disables
+    the cap.
+    """
+    body = ResponseBody(spill_bytes)
+    try:
+        declared = response.headers.get("Content-Length")
+        if max_bytes > 0 and declared and declared.isdigit() and int(declared) > max_bytes:
+            body.size = int(declared)
+            body.oversized = True
+            return body
+        async for chunk in response.aiter_bytes(READ_CHUNK_BYTES):
+            body.write(chunk)
+            if 0 < max_bytes < body.size:
+                body.oversized = True
+                body.close()
+                return body
+        return body
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        await response.aclose()
+
+
+class IncrementalDecoder:
+    """
+    Decode a JSON document from a file while holding only a window of its text.
+
+    The elements of a top-level array, or of arrays that are values of a top-level
+    object (e.g. "user_list"), are decoded a window at a time, so memory is bounded
+    by the decoded result plus one window rather than the raw body. Each window's
+    whole elements are decoded by a single scan, which shares object keys between
+    them as json.loads does; the result is the same size as a json.loads of the body.
+    """
+
+    def __init__(self, file: IO[bytes], chunk_bytes: int = READ_CHUNK_BYTES):
+        self._file = file
+        self._chunk_bytes = chunk_bytes
+        self._read_bytes = chunk_bytes
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._scan_batch = json.JSONDecoder().scan_once
+        # scan_once forgets its key memo after every call, so single values share keys through this one.
+        keys = {}
+        self._scan = json.JSONDecoder(
+            object_pairs_hook=lambda pairs: {keys.setdefault(key, key): value for key, value in pairs}
+        ).scan_once
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the window (dropping the consumed prefix); False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._read_bytes)
+        self._eof = not chunk
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self._buf, self._pos)
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._scan(self._buf, self._pos)
+            except (StopIteration, json.JSONDecodeError):
+                # Incomplete value: read more, doubling the read size so one huge value stays linear.
+                self._read_bytes *= 2
+                if not self._fill():
+                    raise json.JSONDecodeError("Expecting value", self._buf, self._pos) from None
+                continue
+            # A value cut short by the window (e.g. "1." of "1.5") only counts once a delimiter follows it.
+            after = _WHITESPACE.match(self._buf, end).end()
+            if (after >= len(self._buf) or self._buf[after] not in ",:]}") and self._fill():
+                continue
+            self._read_bytes = self._chunk_bytes
+            self._pos = end
+            return value
+
+    def _array(self) -> List[Any]:
+        self._expect("[")
+        items: List[Any] = []
+        if self._peek() == "]":
+            self._pos += 1
+            return items
+        skip, scan, scan_batch = _WHITESPACE.match, self._scan, self._scan_batch
+        while True:
+            buf, pos = self._buf, self._pos
+            # Decode every whole element in the window with one scan: cut after the last "}," and
+            # close the array. A cut inside a string or a nested value cannot parse, so success
+            # means the cut was between elements.
+            cut = buf.rfind("},", pos)
+            if cut > pos:
+                try:
+                    batch, end = scan_batch(f"[{buf[pos:cut + 1]}]", 0)
+                except (StopIteration, json.JSONDecodeError):
+                    batch = None
+                if batch is not None and end == cut - pos + 3:
+                    items.extend(batch)
+                    pos = cut + 2
+            # Then element by element, up to the one that crosses the end of the window.
+            while True:
+                try:
+                    value, end = scan(buf, pos)
+                except StopIteration:
+                    # scan_once does not skip leading whitespace; anything else means the window ends here.
+                    skipped = skip(buf, pos).end()
+                    if skipped == pos:
+                        break
+                    pos = skipped
+                    continue
+                except json.JSONDecodeError:
+                    break
+                delimiter = buf[end:end + 1]
+                if delimiter != "," and delimiter != "]":
+                    end = skip(buf, end).end()
+                    delimiter = buf[end:end + 1]
+                    if delimiter != "," and delimiter != "]":
+                        break
+                items.append(value)
+                if delimiter == "]":
+                    self._pos = end + 1
+                    return items
+                pos = end + 1
+            # The next element or its delimiter crosses the end of the window.
+            self._pos = pos
+            items.append(self._value())
+            if self._expect(",]") == "]":
+                return items
+
+    def _member(self) -> Any:
+        return self._array() if self._peek() == "[" else self._value()
+
+    def decode(self) -> Any:
+        first = self._peek()
+        if first == "{":
+            self._pos += 1
+            result = {}
+            if self._peek() == "}":
+                self._pos += 1
+            else:
+                while True:
+                    if self._peek() != '"':
+                        raise json.JSONDecodeError("Expecting property name enclosed in double quotes", self._buf, self._pos)
+                    key = self._value()
+                    self._expect(":")
+                    result[key] = self._member()
+                    if self._expect(",}") == "}":
+                        break
+        else:
+            result = self._member()
+        if self._peek():
+            raise json.JSONDecodeError("Extra data", self._buf, self._pos)
+        return result
+
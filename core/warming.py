@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from config.config import Config
+from config.endpoints import resolve_upstream
+from core.cache import response_cache
+from core.deadline import bounded, deadline
+from core.limiter import limiters
+from core.metrics import labels, metrics
+from core.scheduler import as_background
+
+
+class _HotKey:
+    __slots__ = ("api_url", "refresh", "score", "updated")
+
+    def __init__(self, api_url: str, refresh: Callable[[], Awaitable[Any]]):
+        self.api_url = api_url
+        self.refresh = refresh
+        self.score = 0.0
+        self.updated = time.monotonic()
+
+    def decayed(self, now: float, half_life: float) -> float:
+        return self.score * math.pow(0.5, (now - self.updated) / half_life)
+
+
+class CacheWarmer:
+    """
+    Keep hot list responses fresh ahead of expiry.
+
+    Lookups of watched URLs are scored with an exponentially decaying hit count.
+    Every `interval` seconds, the `max_keys` hottest keys scoring at least
+    `min_hits` are refreshed in the background if their cache entry would expire
+    before the next pass, so the caller after an expiry still gets a cache hit.
+
+    At most `max_tracked` keys are scored; past that the coldest are forgotten.
+    Nothing is recorded while warming is disabled.
+    """
+
+    def __init__(self, enabled: bool, interval: float, min_hits: float, half_life: float, max_keys: int,
+                 max_tracked: int):
+        self.enabled = enabled
+        self.interval = interval
+        self.min_hits = min_hits
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self.max_tracked = max(1, max_tracked)
+        self._watched: Set[str] = set()
+        self._keys: Dict[str, _HotKey] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def watch(self, api_url: str):
+        self._watched.add(api_url)
+
+    def record(self, key: str, api_url: str, refresh: Callable[[], Awaitable[Any]]):
+        """Count one lookup of `key`; `refresh` refetches it and stores the result in the cache."""
+        if not self.enabled or api_url not in self._watched:
+            return
+        now = time.monotonic()
+        hot = self._keys.get(key)
+        if hot is None:
+            if len(self._keys) >= self.max_tracked:
+                # Make room by forgetting the coldest quarter, so the next new keys do not re-sort every time.
+                self._prune(now, keep=self.max_tracked * 3 // 4)
+            hot = self._keys[key] = _HotKey(api_url, refresh)
+        hot.score = hot.decayed(now, self.half_life) + 1
+        hot.updated = now
+        hot.refresh = refresh
+
+    def _prune(self, now: float, keep: int) -> List[tuple]:
+        """Forget keys that have cooled off, then all but the `keep` hottest; return (score, key) hottest first."""
+        scored = sorted(((hot.decayed(now, self.half_life), key) for key, hot in self._keys.items()), reverse=True)
+        for index, (score, key) in enumerate(scored):
+            if index >= keep or score < self.min_hits / 10:
+                del self._keys[key]
+        return [item for item in scored[:keep] if item[1] in self._keys]
+
+    def hot_keys(self) -> List[str]:
+        scored = self._prune(time.monotonic(), keep=self.max_tracked)
+        return [key for score, key in scored if score >= self.min_hits][:self.max_keys]
+
+    def warm_once(self):
+        horizon = time.monotonic() + self.interval
+        for key in self.hot_keys():
+            entry = response_cache.peek(key)
+            if entry is not None and entry.expires_at > horizon:
+                continue
+            hot = self._keys[key]
+            self.refreshes += 1
+            response_cache.refresh_in_background(key, lambda hot=hot: self._run_refresh(hot))
+
+    async def _run_refresh(self, hot: _HotKey):
+        timeout = Config.for_upstream(resolve_upstream(hot.api_url), "REQUEST_TIMEOUT_SECONDS")
+        with deadline(timeout):
+            await bounded(as_background(hot.refresh()), timeout)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.warm_once()
+            except Exception as e:
+                logging.warning(f"Cache warming pass failed: {e}")
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class Prefetcher:
+    """
+    Fetch the first `top_n` detail records of a list page in the background, at
+    background priority, so the detail calls that usually follow hit the cache.
+
+    At most `max_in_flight` prefetches run per upstream, and none start while the
+    upstream's limiter has callers queued.
+    """
+
+    def __init__(self, enabled: bool, top_n: int, max_in_flight: int):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.max_in_flight = max_in_flight
+        self._in_flight: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = 0
+        self.skipped = 0
+
+    def schedule(self, upstream: str, ids: Iterable[Any], fetch_one: Callable[[str], Awaitable[Any]]):
+        if not self.enabled or self.top_n <= 0:
+            return
+        limiter = limiters.get(upstream)
+        for record_id in [record_id for record_id in ids if record_id is not None][:self.top_n]:
+            if self._in_flight.get(upstream, 0) >= self.max_in_flight or limiter.queue_depth:
+                self.skipped += 1
+                continue
+            self._in_flight[upstream] = self._in_flight.get(upstream, 0) + 1
+            self.started += 1
+            task = asyncio.create_task(self._prefetch(upstream, str(record_id), fetch_one))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, upstream: str, record_id: str, fetch_one: Callable[[str], Awaitable[Any]]):
+        try:
+            await as_background(fetch_one(record_id))
+        except Exception as e:
+            logging.debug(f"Prefetch of {upstream} record {record_id} failed: {e}")
+        finally:
+            self._in_flight[upstream] -= 1
+
+    async def aclose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+cache_warmer = CacheWarmer(
+    Config.CACHE_WARM_ENABLED,
+    Config.CACHE_WARM_INTERVAL_SECONDS,
+    Config.CACHE_WARM_MIN_HITS,
+    Config.CACHE_WARM_HALF_LIFE_SECONDS,
+    Config.CACHE_WARM_MAX_KEYS,
+    Config.CACHE_WARM_MAX_TRACKED_KEYS,
+)
+prefetcher = Prefetcher(Config.PREFETCH_ENABLED, Config.PREFETCH_TOP_N, Config.PREFETCH_MAX_IN_FLIGHT)
+
+metrics.callback("mcp_cache_warm_refreshes_total", "Background refreshes started by the cache warmer",
+                 lambda: {(): cache_warmer.refreshes}, metric_type="counter")
+metrics.callback(
+    "mcp_prefetch_total",
+    "Detail prefetches after list calls by result",
+    lambda: {labels(result="started"): prefetcher.started, labels(result="skipped"): prefetcher.skipped},
+    metric_type="counter",
+)
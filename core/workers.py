@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from config.config import Config
+from core.disk_cache import disk_cache
+from core.metrics import merge_expositions, metrics
+
+WORKER_ID = str(os.getpid())
+
+
+def multi_worker() -> bool:
+    """True in multi-worker mode, where the worker processes coordinate through the disk cache."""
+    return Config.SERVER_WORKERS > 1 and disk_cache.enabled
+
+
+class WorkerMetrics:
+    """
+    Host-wide /metrics for multi-worker mode.
+
+    Every `interval` seconds each worker publishes its own exposition, labelled
+    worker="<pid>", to the shared disk cache. Whichever worker answers a scrape
+    merges the copies of all live workers with a fresh one of its own, so a scrape
+    sees every worker's series instead of only the answering worker's.
+    """
+
+    PREFIX = "metrics:"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self) -> str:
+        text = metrics.render(worker=WORKER_ID)
+        # Copies of workers that stopped publishing expire after a few intervals.
+        await disk_cache.put(self.PREFIX + WORKER_ID, text, ttl=self.interval * 3)
+        return text
+
+    async def render(self) -> str:
+        if not multi_worker():
+            return metrics.render()
+        own = await self.publish()
+        published = await disk_cache.get_prefix(self.PREFIX)
+        published.pop(self.PREFIX + WORKER_ID, None)
+        return merge_expositions([own] + [published[key] for key in sorted(published)])
+
+    async def _run(self):
+        while True:
+            try:
+                await self.publish()
+            except Exception as e:
+                logging.warning(f"Publishing worker metrics failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if multi_worker() and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await disk_cache.delete(self.PREFIX + WORKER_ID)
+
+
+worker_metrics = WorkerMetrics(Config.METRICS_PUBLISH_SECONDS)
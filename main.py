@@ -1,18 +1,50 @@
+from contextlib import asynccontextmanager
+import os
+import signal
+import uvicorn
 from fastmcp import FastMCP
-import logging
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 from tools.system1.template import TemplateTools
 from tools.system2.user import UserTools
 
+from common.decorator import json_result
 from config.config import Config
+from core.auth import auth
+from core.disk_cache import disk_cache
+from core.http_client import http_clients
+from core.index import indexes
+from core.warming import cache_warmer, prefetcher
+from core.workers import worker_metrics
 
 Config.init() 
 
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    await http_clients.start()
+    await indexes.start()
+    cache_warmer.start()
+    worker_metrics.start()
+    try:
+        yield
+    finally:
+        await worker_metrics.aclose()
+        await cache_warmer.aclose()
+        await prefetcher.aclose()
+        await indexes.aclose()
+        await auth.aclose()
+        await http_clients.aclose()
+        disk_cache.close()
+
+
 mcp = FastMCP(
     name="mcp-api-wrapper",
     instructions="""
 Use these APIs to support users.
-"""
+""",
+    lifespan=lifespan,
 )
 
 TOOL_CLASSES = [TemplateTools, UserTools]
@@ -20,18 +52,54 @@ TOOL_CLASSES = [TemplateTools, UserTools]
 for tool_class in TOOL_CLASSES:
     instance = tool_class()
     for tool_func in instance.get_tools_list():
-        mcp.tool()(tool_func)
+        mcp.tool()(json_result(tool_func))
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(await worker_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def create_app():
+    """
+    ASGI app for multi-worker mode. The transport is stateless, so any worker can
+    serve any request of an MCP session. Workers share the SQLite disk cache: cached
+    responses, the list index (refreshed by one worker) and /metrics (merged across
+    workers); each worker logs to its own file (Config.log_file_path).
+
+    Stateless mode issues no Mcp-Session-Id, so fair queuing between sessions keys
+    on the SESSION_KEY_HEADER request header (X-Client-Id), falling back to the
+    client address; clients behind one proxy should send that header.
+    """
+    return mcp.http_app(transport="streamable-http", stateless_http=True)
 
 
 def run_server():
-    mcp.run(transport="streamable-http", host="0.0.0.0", port=8080)
+    if Config.SERVER_WORKERS <= 1:
+        mcp.run(transport="streamable-http", host=Config.SERVER_HOST, port=Config.SERVER_PORT)
+        return
+
+    if not Config.DISK_CACHE_ENABLED:
+        raise SystemExit("SERVER_WORKERS > 1 needs DISK_CACHE_ENABLED=true: workers share the index and metrics through it")
+    os.environ[Config.SUPERVISOR_PID_ENV] = str(os.getpid())
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host=Config.SERVER_HOST,
+        port=Config.SERVER_PORT,
+        workers=Config.SERVER_WORKERS,
+    )
+
 
 def main():
-    logging.basicConfig(level=logging.INFO, force=True)
+    # uvicorn re-raises SIGTERM once it has stopped serving; turning it into
+    # KeyboardInterrupt lets the lifespan shutdown (logout, cache close) run.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     try:
         run_server()
     except KeyboardInterrupt:
         pass
 
+
 if __name__ == "__main__":
     main()
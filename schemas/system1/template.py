@@ -10,5 +10,8 @@ class Template(BaseModel):
     cc_adr: str
     subject: str
 
+class TemplateDetail(Template):
+    body: str = ""
+
 class TemplateList(BaseModel):
     template_list: List[Template]
@@ -0,0 +1,297 @@
+"""
+Concurrent load benchmark for the MCP server.
+Drives many MCP sessions over pooled connections and reports throughput,
+latency percentiles and error rates, optionally against a stored baseline.
+
+Runs offline: with --spawn it starts tests/stub_server.py and main.py itself.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from tests.test_client import MCPTestClient, StubController
+
+DEFAULT_MIX = "get_user_detail=4,get_template_detail=3,get_user_list=1,get_template_list=1,find_user=1"
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """Parse 'tool=weight,tool=weight' into a weighted tool list."""
+    weighted = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weighted.append((name.strip(), float(weight or 1)))
+    return weighted
+
+
+def tool_arguments(tool_name: str, id_range: int) -> dict:
+    """Arguments for one call of a benchmark tool."""
+    item_id = str(random.randint(1, id_range))
+    if tool_name == "get_user_detail":
+        return {"user_id": item_id}
+    if tool_name == "get_template_detail":
+        return {"template_id": item_id}
+    if tool_name == "get_user_details":
+        return {"user_ids": [str(random.randint(1, id_range)) for _ in range(10)]}
+    if tool_name == "get_template_details":
+        return {"template_ids": [str(random.randint(1, id_range)) for _ in range(10)]}
+    if tool_name == "find_user":
+        return {"role": random.choice(["admin", "member"])}
+    if tool_name in ("get_user_list", "get_template_list"):
+        return {"limit": 100}
+    return {}
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    total = len(ordered)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput_rps": total / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _ms(percentile(ordered, 0.50)),
+        "p95_ms": _ms(percentile(ordered, 0.95)),
+        "p99_ms": _ms(percentile(ordered, 0.99)),
+        "max_ms": _ms(ordered[-1] if ordered else None),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+class LoadRunner:
+    """Runs a closed-loop (concurrency) or open-loop (rate) workload."""
+
+    def __init__(self, mcp_url: str, sessions: int, concurrency: int, rate: Optional[float],
+                 duration: float, mix: List[Tuple[str, float]], id_range: int):
+        self.mcp_url = mcp_url
+        self.session_count = sessions
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.tools = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.id_range = id_range
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.tools}
+        self.errors: Dict[str, int] = {name: 0 for name in self.tools}
+
+    async def _call(self, client: MCPTestClient):
+        tool_name = random.choices(self.tools, weights=self.weights)[0]
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = await client.call_tool(tool_name, tool_arguments(tool_name, self.id_range))
+            result = response.get("result", {})
+            structured = result.get("structuredContent") or {}
+            failed = "error" in response or result.get("isError") or structured.get("status") == "error"
+        except (httpx.HTTPError, ValueError):
+            failed = True
+        self.latencies[tool_name].append(time.perf_counter() - start)
+        if failed:
+            self.errors[tool_name] += 1
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=60.0, limits=limits) as http_client:
+            clients = [MCPTestClient(self.mcp_url, http_client=http_client) for _ in range(self.session_count)]
+            await asyncio.gather(*(client.connect(verbose=False) for client in clients))
+
+            start = time.perf_counter()
+            deadline = start + self.duration
+            if self.rate:
+                await self._open_loop(clients, deadline)
+            else:
+                await self._closed_loop(clients, deadline)
+            elapsed = time.perf_counter() - start
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            "config": {
+                "sessions": self.session_count,
+                "concurrency": self.concurrency,
+                "rate": self.rate,
+                "duration_s": self.duration,
+                "mix": dict(zip(self.tools, self.weights)),
+            },
+            "overall": summarize(all_latencies, sum(self.errors.values()), elapsed),
+            "tools": {
+                name: summarize(self.latencies[name], self.errors[name], elapsed)
+                for name in self.tools if self.latencies[name]
+            },
+        }
+
+    async def _closed_loop(self, clients: List[MCPTestClient], deadline: float):
+        async def worker(index: int):
+            client = clients[index % len(clients)]
+            while time.perf_counter() < deadline:
+                await self._call(client)
+
+        await asyncio.gather(*(worker(index) for index in range(self.concurrency)))
+
+    async def _open_loop(self, clients: List[MCPTestClient], deadline: float):
+        in_flight = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        interval = 1.0 / self.rate
+        next_at = time.perf_counter()
+        index = 0
+        while next_at < deadline:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            await in_flight.acquire()
+            task = asyncio.create_task(self._call(clients[index % len(clients)]))
+            task.add_done_callback(lambda _: in_flight.release())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+            next_at += interval
+        await asyncio.gather(*tasks)
+
+
+def compare(report: dict, baseline: dict, threshold: float, error_threshold: float) -> List[str]:
+    """
+    Return human-readable regressions of report versus baseline.
+
+    Latency and throughput may regress by `threshold` (relative); the error rate,
+    usually 0 in the baseline, by `error_threshold` percentage points (absolute).
+    """
+    regressions = []
+    lines = []
+    current, previous = report["overall"], baseline["overall"]
+    for key, higher_is_better in (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False),
+                                  ("p99_ms", False), ("max_ms", False)):
+        now, before = current.get(key), previous.get(key)
+        if now is None or before is None:
+            continue
+        change = (now - before) / before if before else 0.0
+        lines.append(f"  {key:15} {before:12.3f} -> {now:12.3f}  ({change:+.1%})")
+        worse = -change if higher_is_better else change
+        if key != "max_ms" and worse > threshold:
+            regressions.append(f"{key} regressed by {worse:.1%}")
+    now, before = current.get("error_rate"), previous.get("error_rate")
+    if now is not None and before is not None:
+        lines.append(f"  {'error_rate':15} {before:12.3%} -> {now:12.3%}  ({now - before:+.1%} points)")
+        if now - before > error_threshold:
+            regressions.append(f"error_rate rose by {now - before:.1%} points")
+    print("\nComparison against baseline:")
+    print("\n".join(lines))
+    return regressions
+
+
+async def configure_stub(stub_url: str, path: str):
+    """
+    Apply a stub profile: {"dataset": {...}, "latency": [{...}], "faults": [{...}],
+    "bandwidth": {"bytes_per_second": N}, "rate_limit": {"limit": N, "window": S}}.
+    """
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    stub = StubController(stub_url)
+    await stub.reset()
+    if "dataset" in profile:
+        await stub.set_dataset(**profile["dataset"])
+    for latency in profile.get("latency", []):
+        await stub.set_latency(**latency)
+    for faults in profile.get("faults", []):
+        await stub.set_faults(**faults)
+    if "bandwidth" in profile:
+        await stub.set_bandwidth(profile["bandwidth"]["bytes_per_second"])
+    if "rate_limit" in profile:
+        await stub.set_rate_limit(**profile["rate_limit"])
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def spawn_servers(stub_port: int, mcp_port: int) -> List[subprocess.Popen]:
+    """Start the stub upstream and the MCP server as local subprocesses."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["API_HOST_NAME"] = f"localhost:{stub_port}"
+    env["SYSTEM2_HOST_NAME"] = f"localhost:{stub_port}"
+    env["SERVER_PORT"] = str(mcp_port)
+    stub = subprocess.Popen(
+        [sys.executable, "-c", f"from tests.stub_server import run_stub_server; run_stub_server(port={stub_port})"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_for(f"http://localhost:{stub_port}/stub/config/busy")
+    wait_for(f"http://localhost:{mcp_port}/metrics")
+    return [server, stub]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP load benchmark")
+    parser.add_argument("--mcp-url", default="http://localhost:8080", help="MCP server URL")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent MCP sessions")
+    parser.add_argument("--concurrency", type=int, default=20, help="Max requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop request rate (req/s); closed loop if omitted")
+    parser.add_argument("--duration", type=float, default=10.0, help="Run time in seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted tool mix, e.g. get_user_detail=4,get_user_list=1")
+    parser.add_argument("--id-range", type=int, default=2, help="Detail IDs are drawn from 1..N")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON report")
+    parser.add_argument("--save-baseline", help="Also write the report here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression (default 10%%)")
+    parser.add_argument("--error-threshold", type=float, default=0.01,
+                        help="Allowed rise of the error rate in absolute terms (default 1%% point)")
+    parser.add_argument("--spawn", action="store_true", help="Start stub and MCP server locally for the run")
+    parser.add_argument("--stub-port", type=int, default=8081)
+    parser.add_argument("--stub-config", help="JSON stub profile (dataset, latency, faults, bandwidth) to apply first")
+    args = parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        processes = spawn_servers(args.stub_port, httpx.URL(args.mcp_url).port or 8080)
+
+    try:
+        if args.stub_config:
+            await configure_stub(f"http://localhost:{args.stub_port}", args.stub_config)
+        runner = LoadRunner(args.mcp_url, args.sessions, args.concurrency, args.rate,
+                            args.duration, parse_mix(args.mix), args.id_range)
+        report = await runner.run()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(report, indent=2))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold, args.error_threshold)
+        if regressions:
+            print("\nREGRESSION: " + "; ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
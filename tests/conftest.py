@@ -0,0 +1,13 @@
+"""
+pytest setup for the unit tests in this directory.
+Upstream hosts point at a placeholder; tests route requests through in-process transports.
+"""
+
+import os
+
+os.environ.setdefault("API_HOST_NAME", "stub.local")
+os.environ.setdefault("SYSTEM2_HOST_NAME", "stub.local")
+os.environ.setdefault("INDEX_ENABLED", "false")
+
+# Manual scripts that talk to a running server and stub, not pytest tests.
+collect_ignore = ["test_client.py", "benchmark.py", "micro_benchmark.py", "stub_server.py"]
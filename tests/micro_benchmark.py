@@ -0,0 +1,190 @@
+"""
+In-process micro-benchmarks for the wrapper's own overhead.
+The stub app is mounted through httpx.ASGITransport, so no sockets are used.
+Reports per-layer time and tracemalloc peak for small and large payloads.
+"""
+
+import os
+
+os.environ.setdefault("API_HOST_NAME", "stub.local")
+os.environ.setdefault("SYSTEM2_HOST_NAME", "stub.local")
+os.environ.setdefault("INDEX_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from fastmcp import Client
+
+from tests import stub_server
+from main import mcp
+from common.decorator import log_function_call, measure_tool_call
+from config.config import Config
+from config.endpoints.system2 import System2Endpoints
+from core.cache import response_cache
+from core.call_api import call_api, log_requests_and_response
+from core.http_client import http_clients
+from core.json_codec import StdlibCodec, json_codec
+from core.streaming import ResponseBody
+
+
+async def measure(operation: Callable[[], Awaitable], iterations: int) -> Dict[str, float]:
+    """Mean/p50/p95 microseconds per call and tracemalloc peak KiB for one call."""
+    for _ in range(min(10, iterations)):
+        await operation()
+
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await operation()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1] * 1e6, 2),
+        "peak_kib": round(peak / 1024, 2),
+    }
+
+
+async def run_suite(iterations: int) -> Dict[str, Dict[str, float]]:
+    url = System2Endpoints.USER_LIST_URL
+    stub_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_server.app))
+
+    async def noop(self, user_id: str) -> dict:
+        return {}
+
+    logged = log_function_call(noop)
+    measured = measure_tool_call(noop)
+    sample_response = await stub_client.get(url)
+    sample_body = sample_response.content
+    logged_body = ResponseBody(spill_bytes=0)
+    logged_body.write(sample_body)
+    root = logging.getLogger()
+
+    async def log_debug_enabled():
+        level = root.level
+        root.setLevel(logging.DEBUG)
+        root.disabled = True  # format the payload but do not emit it
+        try:
+            log_requests_and_response(sample_response, logged_body)
+        finally:
+            root.disabled = False
+            root.setLevel(level)
+
+    async def log_debug_disabled():
+        log_requests_and_response(sample_response, logged_body)
+
+    stdlib_codec = StdlibCodec()
+    sample_value = json_codec.loads(sample_body)
+
+    async def stdlib_loads():
+        stdlib_codec.loads(sample_body)
+
+    async def codec_loads():
+        json_codec.loads(sample_body)
+
+    async def stdlib_dumps():
+        stdlib_codec.dumps(sample_value)
+
+    async def codec_dumps():
+        json_codec.dumps(sample_value)
+
+    async def cached_call():
+        await call_api(url)
+
+    async def uncached_call():
+        stub_server.state.validators = False
+        try:
+            await call_api(url, cache_ttl=0)
+        finally:
+            stub_server.state.validators = True
+
+    async def spilled_call():
+        spill_bytes = Config.RESPONSE_SPILL_BYTES
+        Config.RESPONSE_SPILL_BYTES = 1  # spool every body to a temp file and decode it incrementally
+        try:
+            await uncached_call()
+        finally:
+            Config.RESPONSE_SPILL_BYTES = spill_bytes
+
+    response_cache.clear()
+    await call_api(url)
+
+    results = {}
+    async with Client(mcp) as mcp_client:
+        layers = {
+            "decorator.noop": lambda: noop(None, "1"),
+            "decorator.log_function_call": lambda: logged(None, "1"),
+            "decorator.measure_tool_call": lambda: measured(None, "1"),
+            "logging.debug_disabled": log_debug_disabled,
+            "logging.debug_enabled": log_debug_enabled,
+            "json.stdlib_loads": stdlib_loads,
+            f"json.{json_codec.name}_loads": codec_loads,
+            "json.stdlib_dumps": stdlib_dumps,
+            f"json.{json_codec.name}_dumps": codec_dumps,
+            "transport.asgi_get": lambda: stub_client.get(url),
+            "transport.asgi_get_json": lambda: _get_json(stub_client, url),
+            "call_api.uncached": uncached_call,
+            "call_api.uncached_spilled": spilled_call,
+            "call_api.revalidated_304": lambda: call_api(url, cache_ttl=0),
+            "call_api.cached": cached_call,
+            "fastmcp.get_user_list": lambda: mcp_client.call_tool("get_user_list", {"limit": 1000}),
+            "fastmcp.get_user_detail": lambda: mcp_client.call_tool("get_user_detail", {"user_id": "1"}),
+        }
+        for name, operation in layers.items():
+            results[name] = await measure(operation, iterations)
+
+    await stub_client.aclose()
+    return results
+
+
+async def _get_json(client: httpx.AsyncClient, url: str):
+    response = await client.get(url)
+    return response.json()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="In-process micro-benchmarks")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--large-users", type=int, default=10000, help="User count for the large payload run")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    await http_clients.use_transport(httpx.ASGITransport(app=stub_server.app))
+
+    report = {}
+    stub_server.state.dataset = stub_server.DatasetConfig()
+    stub_server.state.list_bodies = {}
+    report["small"] = await run_suite(args.iterations)
+
+    stub_server.state.dataset = stub_server.DatasetConfig(users=args.large_users)
+    stub_server.state.list_bodies = {}
+    report["large"] = await run_suite(max(10, args.iterations // 10))
+
+    for payload, results in report.items():
+        print(f"\n=== {payload} payload ===")
+        print(f"{'layer':32} {'mean_us':>12} {'p50_us':>12} {'p95_us':>12} {'peak_kib':>10}")
+        for name, stats in results.items():
+            print(f"{name:32} {stats['mean_us']:12.2f} {stats['p50_us']:12.2f} {stats['p95_us']:12.2f} {stats['peak_kib']:10.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
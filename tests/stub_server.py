@@ -1,31 +1,141 @@
 """
 API Stub Server for testing.
-Supports busy state simulation.
+Supports busy state simulation, synthetic datasets, latency distributions,
+fault injection and bandwidth throttling, all set through /stub/config/*.
 """
 
 import asyncio
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import hashlib
+import json
+import math
+import random
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 import uvicorn
 
 app = FastAPI(title="API Stub Server")
 
+ENDPOINTS = ["templates", "template_detail", "users", "user_detail", "login", "logout"]
+
+
+# Control models
+class BusyConfig(BaseModel):
+    busy: bool
+    delay: Optional[float] = 5.0
+
+class ValidatorsConfig(BaseModel):
+    enabled: bool
+    touch: Optional[bool] = False
+
+class DatasetConfig(BaseModel):
+    users: int = 0              # 0 = built-in sample users
+    templates: int = 0          # 0 = built-in sample templates
+    body_size: int = 64         # template body length in characters
+    seed: int = 0
+    paging: bool = False        # honour offset/limit on list endpoints
+
+class LatencyConfig(BaseModel):
+    endpoint: str = "*"         # one of ENDPOINTS or "*"
+    distribution: str = "fixed" # fixed | normal | pareto
+    mean: float = 0.0           # fixed value or normal mean (seconds)
+    stddev: float = 0.0         # normal standard deviation
+    scale: float = 0.01         # pareto minimum (seconds)
+    alpha: float = 1.5          # pareto shape; lower means a longer tail
+
+class FaultConfig(BaseModel):
+    endpoint: str = "*"
+    rate_429: float = 0.0
+    rate_503: float = 0.0
+    rate_timeout: float = 0.0
+    timeout_seconds: float = 30.0
+    retry_after: Optional[int] = None
+
+class BandwidthConfig(BaseModel):
+    bytes_per_second: float = 0.0   # 0 = unlimited
+
+class RateLimitConfig(BaseModel):
+    limit: int = 0              # requests per window; 0 = unlimited
+    window: float = 1.0         # fixed window length in seconds
+    style: str = "ietf"         # ietf (RateLimit-*) | x (X-RateLimit-*)
+
+class AuthConfig(BaseModel):
+    required: bool = False      # reject template requests without a valid bearer token
+    token_ttl: float = 0.0      # seconds; 0 = tokens never expire
+    revoke: bool = False        # invalidate every issued token now
+
+
 # Stub state
 class StubState:
     busy: bool = False
     busy_delay: float = 5.0
     response_delay: float = 0.0
+    validators: bool = True
+    last_modified: float = time.time()
+    dataset: DatasetConfig = DatasetConfig()
+    latency: Dict[str, LatencyConfig] = {}
+    faults: Dict[str, FaultConfig] = {}
+    bytes_per_second: float = 0.0
+    list_bodies: Dict[str, bytes] = {}
+    auth: AuthConfig = AuthConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    window_start: float = 0.0
+    window_count: int = 0
+    throttled: int = 0
+    tokens: Dict[str, float] = {}   # token -> expiry (0 = never)
+    logins: int = 0
+    logouts: int = 0
 
 state = StubState()
 
 
-# Control endpoints
-class BusyConfig(BaseModel):
-    busy: bool
-    delay: Optional[float] = 5.0
+# Built-in sample data
+TEMPLATES = {
+    1: {
+        "template_id": 1,
+        "account": 100,
+        "valid": 1,
+        "template_name": "Template A",
+        "to_adr": "to@example.com",
+        "cc_adr": "cc@example.com",
+        "subject": "Subject A",
+        "body": "This is the body of Template A."
+    },
+    2: {
+        "template_id": 2,
+        "account": 100,
+        "valid": 1,
+        "template_name": "Template B",
+        "to_adr": "to2@example.com",
+        "cc_adr": "",
+        "subject": "Subject B",
+        "body": "This is the body of Template B."
+    }
+}
+
+USERS = {
+    1: {
+        "user_id": 1,
+        "name": "Alice",
+        "email": "alice@example.com",
+        "role": "admin"
+    },
+    2: {
+        "user_id": 2,
+        "name": "Bob",
+        "email": "bob@example.com",
+        "role": "member"
+    }
+}
+
+ROLES = ["admin", "member", "member", "member", "viewer"]
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do"]
 
+
+# Control endpoints
 @app.post("/stub/config/busy")
 async def set_busy(config: BusyConfig):
     """Set busy state for the stub server."""
@@ -44,138 +154,350 @@ async def set_delay(delay: float):
     state.response_delay = delay
     return {"delay": state.response_delay}
 
+@app.post("/stub/config/validators")
+async def set_validators(config: ValidatorsConfig):
+    """Enable/disable ETag and Last-Modified; touch bumps Last-Modified."""
+    state.validators = config.enabled
+    if config.touch:
+        state.last_modified = time.time()
+    return {"enabled": state.validators, "last_modified": formatdate(state.last_modified, usegmt=True)}
+
+@app.post("/stub/config/dataset")
+async def set_dataset(config: DatasetConfig):
+    """Switch to a seeded synthetic dataset (counts of 0 keep the built-in samples)."""
+    state.dataset = config
+    state.list_bodies = {}
+    state.last_modified = time.time()
+    return config
+
+@app.get("/stub/config/dataset")
+async def get_dataset():
+    """Get current dataset settings."""
+    return state.dataset
+
+@app.post("/stub/config/latency")
+async def set_latency(config: LatencyConfig):
+    """Set the latency distribution for one endpoint, or "*" for all."""
+    check_endpoint(config.endpoint)
+    state.latency[config.endpoint] = config
+    return state.latency
+
+@app.get("/stub/config/latency")
+async def get_latency():
+    """Get latency distributions."""
+    return state.latency
+
+@app.post("/stub/config/faults")
+async def set_faults(config: FaultConfig):
+    """Set probabilistic 429/503/timeout injection for one endpoint, or "*" for all."""
+    check_endpoint(config.endpoint)
+    state.faults[config.endpoint] = config
+    return state.faults
+
+@app.get("/stub/config/faults")
+async def get_faults():
+    """Get fault injection settings."""
+    return state.faults
+
+@app.post("/stub/config/bandwidth")
+async def set_bandwidth(config: BandwidthConfig):
+    """Throttle response bodies to bytes_per_second (0 = unlimited)."""
+    state.bytes_per_second = config.bytes_per_second
+    return config
+
+@app.post("/stub/config/ratelimit")
+async def set_rate_limit(config: RateLimitConfig):
+    """Enforce a fixed-window request quota on API endpoints, advertised in RateLimit headers."""
+    state.rate_limit = config
+    state.window_start = time.monotonic()
+    state.window_count = 0
+    state.throttled = 0
+    return await get_rate_limit()
+
+@app.get("/stub/config/ratelimit")
+async def get_rate_limit():
+    """Current quota settings and how many requests were answered with 429."""
+    return {**state.rate_limit.model_dump(), "throttled": state.throttled}
+
+@app.post("/stub/config/auth")
+async def set_auth(config: AuthConfig):
+    """Require bearer tokens on System1 endpoints; optionally revoke every issued token."""
+    state.auth = config
+    if config.revoke:
+        state.tokens = {}
+    return await get_auth()
+
+@app.get("/stub/config/auth")
+async def get_auth():
+    """Current auth settings and login/logout counts."""
+    return {**state.auth.model_dump(), "active_tokens": len(state.tokens), "logins": state.logins, "logouts": state.logouts}
+
+@app.post("/stub/config/reset")
+async def reset():
+    """Restore every simulation setting to its default."""
+    state.busy = False
+    state.response_delay = 0.0
+    state.validators = True
+    state.dataset = DatasetConfig()
+    state.latency = {}
+    state.faults = {}
+    state.bytes_per_second = 0.0
+    state.list_bodies = {}
+    state.auth = AuthConfig()
+    state.rate_limit = RateLimitConfig()
+    state.throttled = 0
+    state.tokens = {}
+    state.logins = 0
+    state.logouts = 0
+    state.last_modified = time.time()
+    return {"status": "ok"}
+
+def check_endpoint(endpoint: str):
+    if endpoint != "*" and endpoint not in ENDPOINTS:
+        raise HTTPException(status_code=422, detail=f"Unknown endpoint {endpoint!r}; use one of {ENDPOINTS} or '*'")
+
+
+# Synthetic data
+def synthetic_user(user_id: int) -> dict:
+    rng = random.Random(f"{state.dataset.seed}:user:{user_id}")
+    return {
+        "user_id": user_id,
+        "name": f"User {user_id}",
+        "email": f"user{user_id}@example.com",
+        "role": rng.choice(ROLES)
+    }
+
+def synthetic_template(template_id: int, with_body: bool) -> dict:
+    rng = random.Random(f"{state.dataset.seed}:template:{template_id}")
+    template = {
+        "template_id": template_id,
+        "account": 100 + rng.randrange(10),
+        "valid": 1 if rng.random() < 0.9 else 0,
+        "template_name": f"Template {template_id}",
+        "to_adr": f"to{template_id}@example.com",
+        "cc_adr": f"cc{template_id}@example.com" if rng.random() < 0.5 else "",
+        "subject": f"Subject {template_id}"
+    }
+    if with_body:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(12)) + ". "
+        repeats = state.dataset.body_size // len(sentence) + 1
+        template["body"] = (sentence * repeats)[:state.dataset.body_size]
+    return template
+
+def item_count(kind: str) -> int:
+    if kind == "users":
+        return state.dataset.users or len(USERS)
+    return state.dataset.templates or len(TEMPLATES)
+
+def get_item(kind: str, item_id: int, with_body: bool = True) -> Optional[dict]:
+    if kind == "users":
+        if state.dataset.users:
+            return synthetic_user(item_id) if 1 <= item_id <= state.dataset.users else None
+        return USERS.get(item_id)
+    if state.dataset.templates:
+        return synthetic_template(item_id, with_body) if 1 <= item_id <= state.dataset.templates else None
+    template = TEMPLATES.get(item_id)
+    if template is not None and not with_body:
+        template = {k: v for k, v in template.items() if k != "body"}
+    return template
+
+def list_items(kind: str, offset: int, limit: int) -> List[dict]:
+    end = min(item_count(kind), offset + limit)
+    return [get_item(kind, item_id, with_body=False) for item_id in range(offset + 1, end + 1)]
+
+def list_body(kind: str, list_key: str, request: Request) -> bytes:
+    """Serialized list response; full synthetic lists are built once per dataset."""
+    if state.dataset.paging and ("offset" in request.query_params or "limit" in request.query_params):
+        offset = max(0, int(request.query_params.get("offset", 0)))
+        limit = max(1, int(request.query_params.get("limit", 100)))
+        payload = {list_key: list_items(kind, offset, limit), "total": item_count(kind)}
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    body = state.list_bodies.get(kind)
+    if body is None:
+        items = (json.dumps(item, ensure_ascii=False) for item in list_items(kind, 0, item_count(kind)))
+        body = f'{{"{list_key}": ['.encode("utf-8") + ", ".join(items).encode("utf-8") + b"]}"
+        state.list_bodies[kind] = body
+    return body
+
 
 # Simulated API endpoints
-async def check_busy():
-    """Check if server is busy and apply delay."""
+def json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """JSON response, streamed in throttled chunks when a bandwidth limit is set."""
+    if state.bytes_per_second <= 0:
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def throttled():
+        chunk_size = max(1024, int(state.bytes_per_second / 20))
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start:start + chunk_size]
+            await asyncio.sleep(len(chunk) / state.bytes_per_second)
+            yield chunk
+
+    return StreamingResponse(throttled(), media_type="application/json", headers=headers)
+
+def conditional_response(request: Request, payload: Optional[dict] = None, body: Optional[bytes] = None) -> Response:
+    """Return payload with ETag/Last-Modified, or 304 when the client's validators still match."""
+    if body is None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    if not state.validators:
+        return json_response(body)
+
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    last_modified = formatdate(state.last_modified, usegmt=True)
+    headers = {"ETag": etag, "Last-Modified": last_modified}
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = etag in [tag.strip() for tag in if_none_match.split(",")]
+    elif if_modified_since is not None:
+        try:
+            not_modified = int(state.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return json_response(body, headers)
+
+
+def sample_latency(config: LatencyConfig) -> float:
+    if config.distribution == "normal":
+        return max(0.0, random.gauss(config.mean, config.stddev))
+    if config.distribution == "pareto":
+        return config.scale * random.paretovariate(config.alpha)
+    return config.mean
+
+
+async def check_busy(endpoint: str = "*"):
+    """Check if server is busy, apply delay and latency, and inject configured faults."""
     if state.busy:
         raise HTTPException(status_code=503, detail="Service temporarily unavailable")
     if state.response_delay > 0:
         await asyncio.sleep(state.response_delay)
 
+    latency = state.latency.get(endpoint) or state.latency.get("*")
+    if latency is not None:
+        delay = sample_latency(latency)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    faults = state.faults.get(endpoint) or state.faults.get("*")
+    if faults is None:
+        return
+    roll = random.random()
+    headers = {"Retry-After": str(faults.retry_after)} if faults.retry_after is not None else None
+    if roll < faults.rate_429:
+        raise HTTPException(status_code=429, detail="Too many requests", headers=headers)
+    roll -= faults.rate_429
+    if roll < faults.rate_503:
+        raise HTTPException(status_code=503, detail="Service temporarily unavailable", headers=headers)
+    roll -= faults.rate_503
+    if roll < faults.rate_timeout:
+        await asyncio.sleep(faults.timeout_seconds)
+        raise HTTPException(status_code=504, detail="Upstream timed out")
+
+
+@app.middleware("http")
+async def enforce_rate_limit(request: Request, call_next):
+    config = state.rate_limit
+    if not config.limit or request.url.path.startswith("/stub/"):
+        return await call_next(request)
+
+    now = time.monotonic()
+    if now - state.window_start >= config.window:
+        state.window_start = now
+        state.window_count = 0
+    state.window_count += 1
+    reset = max(1, math.ceil(state.window_start + config.window - now))
+    prefix = "X-RateLimit" if config.style == "x" else "RateLimit"
+    headers = {
+        f"{prefix}-Limit": str(config.limit),
+        f"{prefix}-Remaining": str(max(0, config.limit - state.window_count)),
+        f"{prefix}-Reset": str(reset),
+    }
+    if state.window_count > config.limit:
+        state.throttled += 1
+        return JSONResponse({"detail": "Too many requests"}, status_code=429, headers={**headers, "Retry-After": str(reset)})
+
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+
+def check_auth(request: Request):
+    """Reject the request with 401 when auth is required and the bearer token is unknown or expired."""
+    if not state.auth.required:
+        return
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    expires_at = state.tokens.get(token)
+    if expires_at is None or (expires_at and expires_at < time.time()):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
 
 @app.get("/templates")
-async def get_templates():
+async def get_templates(request: Request):
     """Get template list."""
-    await check_busy()
-    return {
-        "template_list": [
-            {
-                "template_id": 1,
-                "account": 100,
-                "valid": 1,
-                "template_name": "Template A",
-                "to_adr": "to@example.com",
-                "cc_adr": "cc@example.com",
-                "subject": "Subject A"
-            },
-            {
-                "template_id": 2,
-                "account": 100,
-                "valid": 1,
-                "template_name": "Template B",
-                "to_adr": "to2@example.com",
-                "cc_adr": "",
-                "subject": "Subject B"
-            }
-        ]
-    }
+    await check_busy("templates")
+    check_auth(request)
+    return conditional_response(request, body=list_body("templates", "template_list", request))
 
 @app.get("/templates/{template_id}")
-async def get_template_detail(template_id: int):
+async def get_template_detail(template_id: int, request: Request):
     """Get template detail."""
-    await check_busy()
-
-    templates = {
-        1: {
-            "template_id": 1,
-            "account": 100,
-            "valid": 1,
-            "template_name": "Template A",
-            "to_adr": "to@example.com",
-            "cc_adr": "cc@example.com",
-            "subject": "Subject A",
-            "body": "This is the body of Template A."
-        },
-        2: {
-            "template_id": 2,
-            "account": 100,
-            "valid": 1,
-            "template_name": "Template B",
-            "to_adr": "to2@example.com",
-            "cc_adr": "",
-            "subject": "Subject B",
-            "body": "This is the body of Template B."
-        }
-    }
+    await check_busy("template_detail")
+    check_auth(request)
 
-    if template_id not in templates:
+    template = get_item("templates", template_id)
+    if template is None:
         raise HTTPException(status_code=404, detail="Template not found")
 
-    return templates[template_id]
+    return conditional_response(request, template)
 
 
 # --- System2: User endpoints ---
 
 @app.get("/users")
-async def get_users():
+async def get_users(request: Request):
     """Get user list."""
-    await check_busy()
-    return {
-        "user_list": [
-            {
-                "user_id": 1,
-                "name": "Alice",
-                "email": "alice@example.com",
-                "role": "admin"
-            },
-            {
-                "user_id": 2,
-                "name": "Bob",
-                "email": "bob@example.com",
-                "role": "member"
-            }
-        ]
-    }
+    await check_busy("users")
+    return conditional_response(request, body=list_body("users", "user_list", request))
 
 @app.get("/users/{user_id}")
-async def get_user_detail(user_id: int):
+async def get_user_detail(user_id: int, request: Request):
     """Get user detail."""
-    await check_busy()
-
-    users = {
-        1: {
-            "user_id": 1,
-            "name": "Alice",
-            "email": "alice@example.com",
-            "role": "admin"
-        },
-        2: {
-            "user_id": 2,
-            "name": "Bob",
-            "email": "bob@example.com",
-            "role": "member"
-        }
-    }
+    await check_busy("user_detail")
 
-    if user_id not in users:
+    user = get_item("users", user_id)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return users[user_id]
+    return conditional_response(request, user)
 
 
 # --- Common endpoints ---
 
-@app.get("/login")
+@app.api_route("/login", methods=["GET", "POST"])
 async def login():
-    """Login endpoint."""
-    await check_busy()
-    return {"status": "ok", "token": "dummy_token_12345"}
-
-@app.get("/logout")
-async def logout():
-    """Logout endpoint."""
-    await check_busy()
+    """Login endpoint. Issues a fresh token per call."""
+    await check_busy("login")
+    state.logins += 1
+    token = f"dummy_token_{state.logins}"
+    state.tokens[token] = time.time() + state.auth.token_ttl if state.auth.token_ttl else 0.0
+    response = {"status": "ok", "token": token}
+    if state.auth.token_ttl:
+        response["expires_in"] = state.auth.token_ttl
+    return response
+
+@app.api_route("/logout", methods=["GET", "POST"])
+async def logout(request: Request):
+    """Logout endpoint. Revokes the bearer token, if any."""
+    await check_busy("logout")
+    state.logouts += 1
+    state.tokens.pop(request.headers.get("Authorization", "").removeprefix("Bearer "), None)
     return {"status": "ok"}
 
 
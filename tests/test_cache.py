@@ -0,0 +1,95 @@
+"""Unit tests for core.cache: TTL hits, stale-while-revalidate, LRU eviction and the TTL=0 opt-out."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config.endpoints.system1 import System1Endpoints
+from core import call_api
+from core.cache import ResponseCache
+from core.http_client import http_clients
+
+URL = System1Endpoints.TEMPLATE_LIST_URL
+
+
+class Upstream:
+    """Answers every request with a new version number."""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        return httpx.Response(200, json={"version": self.requests})
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ResponseCache:
+    cache = ResponseCache(max_entries=2, stale_seconds=10)
+    monkeypatch.setattr(call_api, "response_cache", cache)
+    return cache
+
+
+def run(upstream: Upstream, steps) -> list:
+    async def main():
+        await http_clients.use_transport(httpx.MockTransport(upstream))
+        try:
+            return await steps()
+        finally:
+            await http_clients.use_transport(None)
+
+    return asyncio.run(main())
+
+
+def test_fresh_entry_is_served_without_a_request(cache):
+    upstream = Upstream()
+
+    async def steps():
+        return [await call_api.call_api(URL, cache_ttl=60) for _ in range(3)]
+
+    assert run(upstream, steps) == [{"version": 1}] * 3
+    assert upstream.requests == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(cache):
+    upstream = Upstream()
+
+    async def steps():
+        first = await call_api.call_api(URL, cache_ttl=0.05)
+        await asyncio.sleep(0.1)
+        stale = [await call_api.call_api(URL, cache_ttl=0.05) for _ in range(3)]
+        await asyncio.gather(*cache._tasks)
+        return [first] + stale + [await call_api.call_api(URL, cache_ttl=60)]
+
+    results = run(upstream, steps)
+    assert results[:4] == [{"version": 1}] * 4
+    assert results[4] == {"version": 2}
+    assert upstream.requests == 2
+    assert cache.stale_hits == 3
+
+
+def test_least_recently_used_entry_is_evicted_at_max_entries(cache):
+    upstream = Upstream()
+
+    async def steps():
+        for page in (1, 2):
+            await call_api.call_api(URL, {"page": page}, cache_ttl=60)
+        await call_api.call_api(URL, {"page": 1}, cache_ttl=60)
+        await call_api.call_api(URL, {"page": 3}, cache_ttl=60)
+        return [cache.peek(call_api.make_cache_key("GET", URL, {"page": page})) is not None for page in (1, 2, 3)]
+
+    assert run(upstream, steps) == [True, False, True]
+    assert len(cache) == 2
+    assert cache.evictions == 1
+
+
+def test_ttl_zero_bypasses_the_cache(cache):
+    upstream = Upstream()
+
+    async def steps():
+        return [await call_api.call_api(URL, cache_ttl=0) for _ in range(2)]
+
+    assert run(upstream, steps) == [{"version": 1}, {"version": 2}]
+    assert len(cache) == 0
@@ -0,0 +1,220 @@
+"""Unit tests for core.call_api: retries, circuit breaker, deadlines, hedging, transport swaps and debug logging."""
+
+import asyncio
+import logging
+import time
+
+import httpx
+import pytest
+
+from config.endpoints.system1 import System1Endpoints
+from core import call_api
+from core.http_client import http_clients
+from core.resilience import BreakerRegistry, CircuitBreaker
+from core.streaming import ResponseBody
+
+URL = System1Endpoints.TEMPLATE_LIST_URL
+
+
+class Upstream:
+    """Scripted upstream: answers requests with `statuses` in turn (the last one repeats)."""
+
+    def __init__(self, *statuses: int, seconds: float = 0.0):
+        self.statuses = list(statuses)
+        self.seconds = seconds
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        status = self.statuses[min(self.requests, len(self.statuses) - 1)]
+        self.requests += 1
+        if self.seconds:
+            await asyncio.sleep(self.seconds)
+        return httpx.Response(status, json={"template_list": [], "status": status})
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Fresh breakers and fast retries for the upstream that owns URL."""
+    upstream = call_api.resolve_upstream(URL)
+    monkeypatch.setattr(call_api, "breakers", BreakerRegistry())
+
+    def apply(**values):
+        for key, value in values.items():
+            monkeypatch.setenv(f"{upstream.upper()}_{key}", str(value))
+
+    apply(RETRY_MAX_ATTEMPTS=3, RETRY_BASE_DELAY_SECONDS=0.01, RETRY_MAX_DELAY_SECONDS=0.02,
+          BREAKER_FAILURE_THRESHOLD=3, BREAKER_RESET_TIMEOUT_SECONDS=60)
+    return apply
+
+
+def run(upstream: Upstream, calls: int = 1, timeout: float = 5.0) -> list:
+    async def main():
+        await http_clients.use_transport(httpx.MockTransport(upstream))
+        try:
+            return [await call_api.call_api(URL, cache_ttl=0, timeout=timeout) for _ in range(calls)]
+        finally:
+            await http_clients.use_transport(None)
+
+    return asyncio.run(main())
+
+
+def breaker() -> CircuitBreaker:
+    return call_api.breakers.get(call_api.resolve_upstream(URL))
+
+
+def test_retries_until_success(settings):
+    upstream = Upstream(503, 502, 200)
+    [result] = run(upstream)
+    assert result["status"] == 200
+    assert upstream.requests == 3
+    assert breaker().consecutive_failures == 0
+
+
+def test_breaker_counts_failed_calls_not_attempts(settings):
+    upstream = Upstream(503)
+    run(upstream, calls=2)
+    assert upstream.requests == 6
+    assert breaker().consecutive_failures == 2
+    assert breaker().state == CircuitBreaker.CLOSED
+
+    # The third failed call opens the breaker: it stops retrying and the next call is refused outright.
+    results = run(upstream, calls=2)
+    assert breaker().state == CircuitBreaker.OPEN
+    assert upstream.requests == 7
+    assert all(result["retryable"] for result in results)
+
+
+def test_breaker_opening_mid_call_fails_fast_without_backoff(settings):
+    settings(BREAKER_FAILURE_THRESHOLD=1, RETRY_BASE_DELAY_SECONDS=1, RETRY_MAX_DELAY_SECONDS=1)
+    upstream = Upstream(503)
+    start = time.monotonic()
+    [result] = run(upstream)
+    assert time.monotonic() - start < 0.5
+    assert upstream.requests == 1
+    assert result["retryable"] is True
+    assert "unavailable" in result["message"]
+
+
+def test_no_retry_when_the_backoff_outlasts_the_deadline(settings):
+    settings(RETRY_BASE_DELAY_SECONDS=1, RETRY_MAX_DELAY_SECONDS=1)
+    upstream = Upstream(503)
+    [result] = run(upstream, timeout=0.5)
+    assert upstream.requests == 1
+    assert "503" in result["message"]
+
+
+def test_slow_upstream_hits_the_deadline(settings):
+    upstream = Upstream(200, seconds=1.0)
+    start = time.monotonic()
+    [result] = run(upstream, timeout=0.2)
+    assert time.monotonic() - start < 0.6
+    assert "timeout" in result["message"]
+
+
+def test_coalesced_waiter_is_not_bound_by_the_deadline_of_the_caller_that_started_the_fetch(settings):
+    upstream = Upstream(200, seconds=0.3)
+
+    async def main():
+        await http_clients.use_transport(httpx.MockTransport(upstream))
+        try:
+            hasty = asyncio.create_task(call_api.call_api(URL, cache_ttl=0, timeout=0.1))
+            await asyncio.sleep(0.01)
+            patient = asyncio.create_task(call_api.call_api(URL, cache_ttl=0, timeout=5))
+            return await hasty, await patient
+        finally:
+            await http_clients.use_transport(None)
+
+    hasty, patient = asyncio.run(main())
+    assert "timeout" in hasty["message"]
+    assert patient["status"] == 200
+    # The first fetch died with the hasty caller's deadline; the patient one fetched again.
+    assert upstream.requests == 2
+
+
+class FakeBody:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_hedge_closes_a_loser_that_completed_too(monkeypatch):
+    bodies = []
+
+    async def run():
+        hedge_done = asyncio.Event()
+
+        async def send(*args, **kwargs):
+            body = FakeBody("primary" if not bodies else "hedge")
+            bodies.append(body)
+            if body.name == "primary":
+                await hedge_done.wait()
+            else:
+                hedge_done.set()
+            return httpx.Response(200), body
+
+        monkeypatch.setattr(call_api, "_send", send)
+        monkeypatch.setattr(call_api, "_hedge_delay", lambda upstream: 0.01)
+        return await call_api._send_hedged("http://stub.local/users", None, "system2", None)
+
+    response, body = asyncio.run(run())
+    assert [b.name for b in bodies] == ["primary", "hedge"]
+    assert not body.closed
+    loser = next(b for b in bodies if b is not body)
+    assert loser.closed
+
+
+@pytest.mark.parametrize("primary_seconds", [0.0, 0.05])
+def test_hedge_returns_the_first_answer(monkeypatch, primary_seconds):
+    async def run():
+        calls = []
+
+        async def send(*args, **kwargs):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                await asyncio.sleep(primary_seconds)
+                return httpx.Response(200), FakeBody("primary")
+            return httpx.Response(200), FakeBody("hedge")
+
+        monkeypatch.setattr(call_api, "_send", send)
+        monkeypatch.setattr(call_api, "_hedge_delay", lambda upstream: 0.01)
+        return await call_api._send_hedged("http://stub.local/users", None, "system2", None)
+
+    response, body = asyncio.run(run())
+    assert body.name == ("primary" if primary_seconds == 0.0 else "hedge")
+
+
+def test_swapping_the_transport_closes_existing_clients():
+    async def main():
+        await http_clients.use_transport(httpx.MockTransport(Upstream(200)))
+        client = http_clients.get("system1")
+        await http_clients.use_transport(None)
+        return client, http_clients.get("system1")
+
+    old, new = asyncio.run(main())
+    assert old.is_closed
+    assert new is not old
+    asyncio.run(http_clients.aclose())
+
+
+def body_of(text: str) -> ResponseBody:
+    body = ResponseBody(spill_bytes=0)
+    body.write(text.encode())
+    return body
+
+
+def test_debug_log_redacts_credentials(caplog):
+    request = httpx.Request("GET", URL, headers={"Authorization": "Bearer secret-token", "Cookie": "sid=secret-cookie"})
+    response = httpx.Response(200, headers={"Set-Cookie": "sid=secret-cookie"}, request=request)
+    with caplog.at_level(logging.DEBUG):
+        call_api.log_requests_and_response(response, body_of("{}"))
+    assert "[redacted]" in caplog.text
+    assert "secret" not in caplog.text
+
+
+def test_logged_body_is_cut_by_characters_not_bytes():
+    assert call_api._truncate(body_of("é" * 5), 5) == "é" * 5
+    assert call_api._truncate(body_of("é" * 10), 5) == "é" * 5 + "... [truncated, 20 bytes in total]"
+    assert call_api._truncate(body_of("a€b"), 2) == "a€... [truncated, 5 bytes in total]"
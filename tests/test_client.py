@@ -13,11 +13,13 @@ from typing import Optional
 class MCPTestClient:
     """Test client for MCP server with session management."""
 
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    def __init__(self, base_url: str = "http://localhost:8080", http_client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url
         self.mcp_url = f"{base_url}/mcp"
         self.session_id: Optional[str] = None
         self.request_id = 0
+        self.http_client = http_client
+        self.connected = False
 
     def _get_headers(self) -> dict:
         """Get headers with session ID if available."""
@@ -34,6 +36,14 @@ class MCPTestClient:
         self.request_id += 1
         return self.request_id
 
+    async def _post(self, payload: dict) -> httpx.Response:
+        """POST to the MCP endpoint, reusing the shared pooled client when one was given."""
+        if self.http_client is not None:
+            return await self.http_client.post(self.mcp_url, json=payload, headers=self._get_headers())
+
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return await client.post(self.mcp_url, json=payload, headers=self._get_headers())
+
     def _parse_sse_response(self, text: str) -> dict:
         """Parse SSE response and extract JSON data."""
         for line in text.strip().split("\n"):
@@ -57,18 +67,13 @@ class MCPTestClient:
             }
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.mcp_url,
-                json=payload,
-                headers=self._get_headers()
-            )
+        response = await self._post(payload)
 
-            # Save session ID from response header
-            if "mcp-session-id" in response.headers:
-                self.session_id = response.headers["mcp-session-id"]
+        # Save session ID from response header
+        if "mcp-session-id" in response.headers:
+            self.session_id = response.headers["mcp-session-id"]
 
-            return self._parse_sse_response(response.text)
+        return self._parse_sse_response(response.text)
 
     async def send_initialized(self) -> None:
         """Send initialized notification."""
@@ -78,23 +83,20 @@ class MCPTestClient:
             "params": {}
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            await client.post(
-                self.mcp_url,
-                json=payload,
-                headers=self._get_headers()
-            )
+        await self._post(payload)
 
-    async def connect(self) -> dict:
+    async def connect(self, verbose: bool = True) -> dict:
         """Initialize and complete handshake."""
         result = await self.initialize()
         await self.send_initialized()
-        print(f"Connected with session ID: {self.session_id}")
+        self.connected = True
+        if verbose:
+            print(f"Connected with session ID: {self.session_id}")
         return result
 
     async def call_tool(self, tool_name: str, arguments: Optional[dict] = None) -> dict:
         """Call an MCP tool."""
-        if not self.session_id:
+        if not self.connected:
             await self.connect()
 
         payload = {
@@ -107,17 +109,12 @@ class MCPTestClient:
             }
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.mcp_url,
-                json=payload,
-                headers=self._get_headers()
-            )
-            return self._parse_sse_response(response.text)
+        response = await self._post(payload)
+        return self._parse_sse_response(response.text)
 
     async def list_tools(self) -> dict:
         """List available MCP tools."""
-        if not self.session_id:
+        if not self.connected:
             await self.connect()
 
         payload = {
@@ -127,13 +124,8 @@ class MCPTestClient:
             "params": {}
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.mcp_url,
-                json=payload,
-                headers=self._get_headers()
-            )
-            return self._parse_sse_response(response.text)
+        response = await self._post(payload)
+        return self._parse_sse_response(response.text)
 
 
 class StubController:
@@ -166,6 +158,51 @@ class StubController:
             )
             return response.json()
 
+    async def _post_config(self, name: str, config: dict) -> dict:
+        async with httpx.AsyncClient(timeout=300.0) as client:
+            response = await client.post(f"{self.base_url}/stub/config/{name}", json=config)
+            return response.json()
+
+    async def set_dataset(self, users: int = 0, templates: int = 0, body_size: int = 64,
+                          seed: int = 0, paging: bool = False) -> dict:
+        """Switch the stub to a seeded synthetic dataset."""
+        return await self._post_config("dataset", {
+            "users": users, "templates": templates, "body_size": body_size, "seed": seed, "paging": paging
+        })
+
+    async def set_latency(self, endpoint: str = "*", distribution: str = "fixed", **params) -> dict:
+        """Set a latency distribution (fixed/normal/pareto) for an endpoint."""
+        return await self._post_config("latency", {"endpoint": endpoint, "distribution": distribution, **params})
+
+    async def set_faults(self, endpoint: str = "*", **rates) -> dict:
+        """Set 429/503/timeout injection rates for an endpoint."""
+        return await self._post_config("faults", {"endpoint": endpoint, **rates})
+
+    async def set_bandwidth(self, bytes_per_second: float) -> dict:
+        """Throttle stub response bodies."""
+        return await self._post_config("bandwidth", {"bytes_per_second": bytes_per_second})
+
+    async def reset(self) -> dict:
+        """Reset every stub simulation setting."""
+        return await self._post_config("reset", {})
+
+    async def set_validators(self, enabled: bool, touch: bool = False) -> dict:
+        """Enable/disable ETag and Last-Modified validators."""
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{self.base_url}/stub/config/validators",
+                json={"enabled": enabled, "touch": touch}
+            )
+            return response.json()
+
+    async def set_rate_limit(self, limit: int, window: float = 1.0, style: str = "ietf") -> dict:
+        """Enforce a fixed-window quota on the stub's API endpoints (limit=0 disables)."""
+        return await self._post_config("ratelimit", {"limit": limit, "window": window, "style": style})
+
+    async def set_auth(self, required: bool, token_ttl: float = 0.0, revoke: bool = False) -> dict:
+        """Require bearer tokens on System1 endpoints and/or revoke issued tokens."""
+        return await self._post_config("auth", {"required": required, "token_ttl": token_ttl, "revoke": revoke})
+
 
 async def test_normal_flow(mcp_client: MCPTestClient):
     """Test normal API flow."""
@@ -225,11 +262,67 @@ async def test_delayed_response(mcp_client: MCPTestClient, stub_ctrl: StubContro
     await stub_ctrl.set_delay(0.0)
 
 
+async def test_conditional_requests(mcp_client: MCPTestClient, stub_ctrl: StubController):
+    """Test ETag / Last-Modified revalidation."""
+    print("\n=== Test: Conditional Requests ===")
+
+    print("\n1. Enable validators on stub:")
+    result = await stub_ctrl.set_validators(True)
+    print(json.dumps(result, indent=2))
+
+    print("\n2. Revalidate /users directly against the stub (second request should be 304):")
+    async with httpx.AsyncClient() as client:
+        first = await client.get(f"{stub_ctrl.base_url}/users")
+        etag = first.headers.get("etag")
+        second = await client.get(f"{stub_ctrl.base_url}/users", headers={"If-None-Match": etag})
+    print(f"First: {first.status_code} ETag={etag}")
+    print(f"Second: {second.status_code}")
+
+    print("\n3. Get user list through the wrapper:")
+    result = await mcp_client.call_tool("get_user_list")
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    print("\n4. Upstream 304 responses seen by the wrapper:")
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{mcp_client.base_url}/metrics")
+    for line in response.text.splitlines():
+        if line.startswith("mcp_upstream_responses_total") and 'status="304"' in line:
+            print(line)
+
+
+async def test_authentication(mcp_client: MCPTestClient, stub_ctrl: StubController):
+    """
+    Test managed login, token reuse and re-authentication after a 401.
+    Start the server with SYSTEM1_AUTH_ENABLED=true CACHE_TTL_SECONDS=0 INDEX_ENABLED=false.
+    """
+    print("\n=== Test: Authentication ===")
+
+    print("\n1. Require tokens on stub:")
+    result = await stub_ctrl.set_auth(True)
+    print(json.dumps(result, indent=2))
+
+    print("\n2. Five concurrent template calls (should share one login):")
+    results = await asyncio.gather(*[
+        mcp_client.call_tool("get_template_detail", {"template_id": "1"}) for _ in range(5)
+    ])
+    print(json.dumps(results[0], indent=2, ensure_ascii=False))
+    print(json.dumps(await stub_ctrl.set_auth(True), indent=2))
+
+    print("\n3. Revoke tokens, then call again (should re-login once and succeed):")
+    await stub_ctrl.set_auth(True, revoke=True)
+    result = await mcp_client.call_tool("get_template_detail", {"template_id": "2"})
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(json.dumps(await stub_ctrl.set_auth(True), indent=2))
+
+    print("\n4. Disable auth requirement:")
+    print(json.dumps(await stub_ctrl.set_auth(False), indent=2))
+
+
 async def main():
     parser = argparse.ArgumentParser(description="MCP Test Client")
     parser.add_argument("--mcp-url", default="http://localhost:8080", help="MCP server URL")
     parser.add_argument("--stub-url", default="http://localhost:8081", help="Stub server URL")
-    parser.add_argument("--test", choices=["normal", "busy", "delay", "all"], default="all")
+    parser.add_argument("--test", choices=["normal", "busy", "delay", "conditional", "auth", "all"], default="all")
     args = parser.parse_args()
 
     mcp_client = MCPTestClient(args.mcp_url)
@@ -245,6 +338,12 @@ async def main():
         if args.test in ["delay", "all"]:
             await test_delayed_response(mcp_client, stub_ctrl)
 
+        if args.test in ["conditional", "all"]:
+            await test_conditional_requests(mcp_client, stub_ctrl)
+
+        if args.test in ["auth", "all"]:
+            await test_authentication(mcp_client, stub_ctrl)
+
     except httpx.RequestError as e:
         print(f"Request error: {e}")
     except Exception as e:
@@ -0,0 +1,48 @@
+"""Unit tests for core.disk_cache: reads, expiry and LRU access times."""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from core.disk_cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, stale_seconds=0, enabled=True)
+    yield cache
+    cache.close()
+
+
+def accessed_at(cache: DiskCache, key: str) -> float:
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute("SELECT accessed_at FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def age(cache: DiskCache, key: str, seconds: float):
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE responses SET accessed_at = accessed_at - ? WHERE key = ?", (seconds, key))
+
+
+def test_recent_reads_do_not_write(cache):
+    asyncio.run(cache.put("k", {"a": 1}, ttl=60))
+    written = accessed_at(cache, "k")
+    stored = asyncio.run(cache.get("k"))
+    assert stored.value == {"a": 1}
+    assert accessed_at(cache, "k") == written
+    assert cache.hits == 1
+
+
+def test_stale_access_time_is_refreshed(cache):
+    asyncio.run(cache.put("k", {"a": 1}, ttl=600))
+    age(cache, "k", DiskCache.TOUCH_AFTER_SECONDS + 1)
+    asyncio.run(cache.get("k"))
+    assert accessed_at(cache, "k") == pytest.approx(time.time(), abs=5)
+
+
+def test_expired_rows_without_validators_are_dropped(cache):
+    asyncio.run(cache.put("k", {"a": 1}, ttl=0))
+    assert asyncio.run(cache.get("k")) is None
+    assert cache.misses == 1
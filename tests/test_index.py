@@ -0,0 +1,74 @@
+"""Unit tests for core.index: incremental refreshes, lookups, freshness and the shared refresh lease."""
+
+import asyncio
+
+from core import index as index_module
+from core.disk_cache import DiskCache
+from core.index import RecordIndex
+
+USERS = [
+    {"user_id": 1, "email": "ann@example.com", "role": "admin"},
+    {"user_id": 2, "email": "bob@example.com", "role": "user"},
+    {"user_id": 3, "email": "cy@example.com", "role": "user"},
+]
+
+
+def user_index(items=USERS, fetches=None) -> RecordIndex:
+    async def fetch_items():
+        if fetches is not None:
+            fetches.append(1)
+        return list(items)
+
+    return RecordIndex("users", key_field="user_id", indexed_fields=["email", "role"],
+                       fetch_items=fetch_items, refresh_seconds=300)
+
+
+def test_apply_diffs_and_reindexes_only_what_changed():
+    index = user_index()
+    assert index.apply(USERS) == {"added": 3, "changed": 0, "removed": 0}
+    promoted = dict(USERS[1], role="admin")
+    assert index.apply([USERS[0], promoted]) == {"added": 0, "changed": 1, "removed": 1}
+    assert len(index) == 2
+    assert index.get("2")["role"] == "admin"
+    assert index.get(3) is None
+    assert [user["user_id"] for user in index.find({"role": "ADMIN"})] == [1, 2]
+    assert index.find({"role": "user"}) == []
+    assert index.find({"email": "Bob@Example.com ", "role": "admin"}) == [promoted]
+
+
+def test_freshness_counts_the_age_of_the_data():
+    index = user_index()
+    assert not index.is_fresh()
+    index.apply(USERS, age=45)
+    assert index.is_fresh()
+    assert not index.is_fresh(max_age=30)
+    assert index.is_fresh(max_age=60)
+
+
+def test_one_worker_fetches_and_the_others_refresh_from_its_copy(tmp_path, monkeypatch):
+    shared = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, stale_seconds=0, enabled=True)
+    monkeypatch.setattr(index_module, "disk_cache", shared)
+    monkeypatch.setattr(index_module, "multi_worker", lambda: True)
+    fetches = {"1": [], "2": []}
+    workers = {worker: user_index(fetches=fetches[worker]) for worker in fetches}
+
+    async def refresh(worker: str):
+        monkeypatch.setattr(index_module, "WORKER_ID", worker)
+        await workers[worker].refresh()
+
+    async def run():
+        await refresh("1")
+        await refresh("2")
+        await refresh("1")
+        await workers["1"].stop()
+        # The lease passes on once its holder lets it go.
+        await refresh("2")
+
+    try:
+        asyncio.run(run())
+    finally:
+        shared.close()
+    assert len(fetches["1"]) == 2
+    assert len(fetches["2"]) == 1
+    assert len(workers["2"]) == 3
+    assert workers["2"].is_fresh(max_age=30)
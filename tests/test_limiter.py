@@ -0,0 +1,158 @@
+"""Unit tests for core.limiter: AIMD adjustment, cancelled requests and admission control."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config.endpoints.system1 import System1Endpoints
+from core import call_api
+from core.http_client import http_clients
+from core.limiter import AdaptiveLimiter, LimiterRegistry
+
+URL = System1Endpoints.TEMPLATE_LIST_URL
+
+
+def limiter() -> AdaptiveLimiter:
+    return AdaptiveLimiter("up", initial=10, floor=1, ceiling=50, backoff_ratio=0.5, latency_tolerance=2.0)
+
+
+def test_error_backs_the_limit_off():
+    up = limiter()
+
+    async def run():
+        try:
+            async with up.slot():
+                raise ConnectionError()
+        except ConnectionError:
+            pass
+
+    asyncio.run(run())
+    assert up.limit == 5
+    assert up.in_flight == 0
+
+
+def test_cancelled_request_leaves_limit_and_baseline_alone():
+    up = limiter()
+
+    async def request(seconds: float):
+        async with up.slot() as slot:
+            await asyncio.sleep(seconds)
+            slot.record(200)
+
+    async def run():
+        await request(0.01)
+        baseline = up._baseline_latency
+        # Cancelled like a losing hedge or a call past its deadline.
+        task = asyncio.create_task(request(10))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return baseline
+
+    baseline = asyncio.run(run())
+    assert up.limit == 10
+    assert up.in_flight == 0
+    assert up._baseline_latency == baseline
+
+
+def test_slow_body_after_fast_headers_is_not_congestion():
+    up = limiter()
+
+    async def request(headers_seconds: float, body_seconds: float):
+        async with up.slot() as slot:
+            await asyncio.sleep(headers_seconds)
+            slot.record(200, headers_seconds)
+            await asyncio.sleep(body_seconds)
+
+    async def run():
+        await request(0.01, 0)
+        # A large list: quick headers, long body download.
+        await request(0.01, 0.1)
+
+    asyncio.run(run())
+    assert up.limit == 10
+    assert up._baseline_latency < 0.02
+
+
+def test_waiter_cancelled_after_its_queue_wait_expired_holds_no_slot():
+    up = AdaptiveLimiter("up", initial=1, floor=1, ceiling=1, backoff_ratio=0.5,
+                         latency_tolerance=2.0, max_queue_wait=0.05)
+    expire = up._expire
+
+    async def run():
+        await up.acquire()
+        waiter = asyncio.create_task(up.acquire())
+
+        def expire_then_cancel(entry):
+            # Timed out in the queue and cancelled before it could resume.
+            expire(entry)
+            waiter.cancel()
+
+        up._expire = expire_then_cancel
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert up.in_flight == 1
+        up.release(0.01, False)
+
+    asyncio.run(run())
+    assert up.in_flight == 0
+    assert up.limit == 1
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    """A fresh limiter with a single slot for the upstream that owns URL."""
+    upstream = call_api.resolve_upstream(URL)
+    monkeypatch.setattr(call_api, "limiters", LimiterRegistry())
+
+    def apply(**values):
+        for key, value in values.items():
+            monkeypatch.setenv(f"{upstream.upper()}_{key}", str(value))
+
+    apply(API_MAX_CONCURRENT=1, LIMITER_MAX_CONCURRENT=1, LIMITER_MAX_QUEUE=1, LIMITER_MAX_QUEUE_WAIT_SECONDS=5)
+    return apply
+
+
+def concurrent_calls(calls: int, seconds: float) -> list:
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(seconds)
+        return httpx.Response(200, json={"template_list": []})
+
+    async def main():
+        await http_clients.use_transport(httpx.MockTransport(slow))
+        try:
+            tasks = []
+            for n in range(calls):
+                # Distinct params, so the calls are not coalesced into one fetch.
+                tasks.append(asyncio.create_task(call_api.call_api(URL, {"page": n}, cache_ttl=0)))
+                # Let each call reach the limiter before the next one starts.
+                await asyncio.sleep(0.01)
+            return await asyncio.gather(*tasks)
+        finally:
+            await http_clients.use_transport(None)
+
+    return asyncio.run(main())
+
+
+def test_call_beyond_a_full_queue_is_rejected_as_busy(one_slot):
+    first, queued, rejected = concurrent_calls(3, seconds=0.1)
+    assert first == queued == {"template_list": []}
+    assert rejected["status"] == "error"
+    assert rejected["message"].startswith("API busy")
+    assert "queue full" in rejected["message"]
+    assert rejected["retryable"] is True
+    assert rejected["retry_after"] > 0
+    assert call_api.limiters.get(call_api.resolve_upstream(URL)).rejected == 1
+
+
+def test_call_queued_past_the_max_wait_is_rejected_as_busy(one_slot):
+    one_slot(LIMITER_MAX_QUEUE_WAIT_SECONDS=0.05)
+    first, expired = concurrent_calls(2, seconds=0.3)
+    assert first == {"template_list": []}
+    assert expired["message"].startswith("API busy")
+    assert "queue timeout" in expired["message"]
+    assert expired["retryable"] is True
+    limiter = call_api.limiters.get(call_api.resolve_upstream(URL))
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth == 0
@@ -0,0 +1,65 @@
+"""Unit tests for core.pagination: snapshot cursors and the filters they belong to."""
+
+import asyncio
+
+from core import pagination
+from core.disk_cache import DiskCache
+from core.projection import filter_key
+
+ITEMS = [
+    {"template_id": i, "template_name": f"Invoice {i}" if i % 2 else f"Receipt {i}", "active": i % 3 == 0}
+    for i in range(1, 11)
+]
+
+
+def test_filter_key_ignores_order_and_value_types():
+    assert filter_key({"a": 1, "b": True}) == filter_key({"b": "true", "a": "1"})
+    assert filter_key(None) == filter_key({}) != filter_key({"a": 1})
+
+
+def page(monkeypatch, **kwargs) -> dict:
+    async def fake_call_api(**_):
+        return {"template_list": ITEMS}
+
+    monkeypatch.setattr(pagination, "call_api", fake_call_api)
+    return asyncio.run(pagination.paginate_list("http://stub.local/templates", "template_list", cache_ttl=0, **kwargs))
+
+
+def test_snapshot_cursor_walks_the_filtered_list(monkeypatch):
+    where = {"template_name": "Invoice*"}
+    first = page(monkeypatch, limit=2, where=where)
+    assert [item["template_id"] for item in first["template_list"]] == [1, 3]
+    second = page(monkeypatch, limit=2, where={"template_name": "Invoice*"}, cursor=first["next_cursor"])
+    assert [item["template_id"] for item in second["template_list"]] == [5, 7]
+    assert second["total"] == 5
+
+
+def test_snapshot_cursor_rejects_a_different_filter(monkeypatch):
+    first = page(monkeypatch, limit=2, where={"active": True})
+    for where in ({"active": False}, None):
+        result = page(monkeypatch, limit=2, where=where, cursor=first["next_cursor"])
+        assert result["status"] == "error"
+        assert "where" in result["message"]
+    assert "status" not in page(monkeypatch, limit=2, where={"active": "true"}, cursor=first["next_cursor"])
+
+
+def test_cursor_issued_by_one_worker_resolves_on_another(tmp_path, monkeypatch):
+    shared = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, stale_seconds=0, enabled=True)
+    where = {"template_name": "Invoice*"}
+    try:
+        monkeypatch.setattr(pagination, "list_snapshots", pagination.ListSnapshotStore(60, 10, shared=shared))
+        first = page(monkeypatch, limit=2, where=where)
+        monkeypatch.setattr(pagination, "list_snapshots", pagination.ListSnapshotStore(60, 10, shared=shared))
+        second = page(monkeypatch, limit=2, where=where, cursor=first["next_cursor"])
+        assert [item["template_id"] for item in second["template_list"]] == [5, 7]
+        assert page(monkeypatch, limit=2, where={"active": True}, cursor=first["next_cursor"])["status"] == "error"
+    finally:
+        shared.close()
+
+
+def test_cursor_of_another_worker_expires_without_a_shared_store(monkeypatch):
+    first = page(monkeypatch, limit=2)
+    monkeypatch.setattr(pagination, "list_snapshots", pagination.ListSnapshotStore(60, 10))
+    result = page(monkeypatch, limit=2, cursor=first["next_cursor"])
+    assert result["status"] == "error"
+    assert "expired" in result["message"]
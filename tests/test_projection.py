@@ -0,0 +1,47 @@
+"""Unit tests for core.projection filters."""
+
+import pytest
+
+from core.projection import filter_items
+
+ITEMS = [
+    {"template_id": i, "template_name": f"Invoice {i}" if i % 2 else f"Receipt {i}", "active": i % 3 == 0}
+    for i in range(1, 11)
+]
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"template_id": 3}, [3]),
+    ({"template_id": "3"}, [3]),
+    ({"active": True}, [3, 6, 9]),
+    ({"active": "true"}, [3, 6, 9]),
+    ({"template_name": "Invoice*", "active": False}, [1, 5, 7]),
+    ({"template_name": "Invoice 1"}, [1]),
+])
+def test_filter_compares_normalized_values(where, expected):
+    assert [item["template_id"] for item in filter_items(ITEMS, where)] == expected
+
+
+TEMPLATES = [
+    {"template_id": 1, "valid": 1, "rate": 1.5},
+    {"template_id": 2, "valid": 0, "rate": 2.0},
+    {"template_id": 3, "valid": 1, "rate": 2},
+]
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"valid": True}, [1, 3]),
+    ({"valid": False}, [2]),
+    ({"valid": "true"}, [1, 3]),
+    ({"valid": 1}, [1, 3]),
+    ({"valid": 2}, []),
+    ({"rate": 1.5}, [1]),
+    ({"rate": "1.5"}, [1]),
+    ({"rate": 2}, [2, 3]),
+    ({"rate": 2.0}, [2, 3]),
+    ({"rate": "fast"}, []),
+    ({"template_id": 1.0}, [1]),
+])
+def test_filter_converts_values_to_the_field_type(where, expected):
+    assert [item["template_id"] for item in filter_items(TEMPLATES, where)] == expected
+
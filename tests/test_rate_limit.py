@@ -0,0 +1,109 @@
+"""Unit tests for core.rate_limit: token-bucket pacing and adapting to quota headers."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from core.deadline import deadline
+from core.limiter import AdmissionRejected
+from core.rate_limit import RateLimitRegistry, TokenBucket
+
+
+def response(status: int = 200, **headers: str) -> httpx.Response:
+    return httpx.Response(status, headers={name.replace("_", "-"): value for name, value in headers.items()})
+
+
+def quota(limit: int, left: int, reset: int) -> httpx.Response:
+    return response(RateLimit_Limit=str(limit), RateLimit_Remaining=str(left), RateLimit_Reset=str(reset))
+
+
+async def acquire_times(bucket: TokenBucket, calls: int, during=None) -> list:
+    start = time.monotonic()
+
+    async def one():
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    tasks = [asyncio.create_task(one()) for _ in range(calls)]
+    if during is not None:
+        await during()
+    return sorted(await asyncio.gather(*tasks))
+
+
+def test_bucket_smooths_a_burst_to_the_rate():
+    bucket = TokenBucket("up", rate=50, burst=2)
+    times = asyncio.run(acquire_times(bucket, 7))
+    assert times[1] < 0.01
+    assert times[-1] == pytest.approx(5 / 50, abs=0.03)
+
+
+def test_pause_holds_back_callers_already_sleeping():
+    bucket = TokenBucket("up", rate=20, burst=1)
+
+    async def pause_soon():
+        await asyncio.sleep(0.01)
+        bucket.pause(0.3)
+
+    times = asyncio.run(acquire_times(bucket, 4, pause_soon))
+    assert times[0] < 0.01
+    assert all(t >= 0.3 for t in times[1:])
+
+
+def test_lower_quota_rate_slows_callers_already_sleeping():
+    bucket = TokenBucket("up", rate=100, burst=1)
+
+    async def learn_quota():
+        await asyncio.sleep(0.005)
+        bucket.observe(quota(limit=10, left=5, reset=1))
+
+    times = asyncio.run(acquire_times(bucket, 4, learn_quota))
+    # Reserved at 100/s (~30 ms for the last), then re-queued at 10/s.
+    assert times[-1] >= 0.25
+
+
+def test_wait_beyond_the_deadline_is_rejected_and_returns_the_token():
+    bucket = TokenBucket("up", rate=1, burst=1)
+
+    async def run():
+        await bucket.acquire()
+        with deadline(0.1):
+            with pytest.raises(AdmissionRejected):
+                await bucket.acquire()
+
+    asyncio.run(run())
+    assert bucket.tokens < 0.1
+
+
+def test_exhausted_quota_pauses_until_reset():
+    bucket = TokenBucket("up", rate=0, burst=5)
+    bucket.observe(quota(limit=100, left=0, reset=1))
+
+    async def run():
+        with deadline(0.5):
+            with pytest.raises(AdmissionRejected):
+                await bucket.acquire()
+
+    asyncio.run(run())
+
+
+def test_registry_builds_buckets_from_quota_headers(monkeypatch):
+    monkeypatch.setenv("UP_RATE_LIMIT_PER_SECOND", "0")
+    registry = RateLimitRegistry()
+    assert registry.get("up") is None
+    registry.observe("up", response())
+    assert registry.get("up") is None
+
+    registry.observe("up", quota(limit=10, left=10, reset=1))
+    bucket = registry.get("up")
+    assert bucket is not None
+    assert bucket.effective_rate == pytest.approx(10)
+
+
+def test_registry_can_ignore_quota_headers(monkeypatch):
+    monkeypatch.setenv("UP_RATE_LIMIT_PER_SECOND", "0")
+    monkeypatch.setenv("UP_RATE_LIMIT_FOLLOW_HEADERS", "false")
+    registry = RateLimitRegistry()
+    registry.observe("up", quota(limit=10, left=0, reset=1))
+    assert registry.get("up") is None
@@ -0,0 +1,104 @@
+"""Unit tests for core.scheduler: class shares, per-session fairness and priority contexts."""
+
+import asyncio
+
+from core.scheduler import (BACKGROUND, BACKGROUND_FLOW, BULK, INTERACTIVE, FairQueue, as_background,
+                            current_flow, current_priority, flow_context)
+
+WEIGHTS = {INTERACTIVE: 8, BULK: 2, BACKGROUND: 1}
+
+
+class Waiter:
+    """Stands in for the limiter's future; only done() is consulted."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def done(self) -> bool:
+        return self.cancelled
+
+
+def drain(queue: FairQueue) -> list:
+    order = []
+    while (entry := queue.pop()) is not None:
+        order.append((entry.priority, entry.flow))
+    return order
+
+
+def test_sessions_in_a_class_take_turns():
+    queue = FairQueue(WEIGHTS)
+    for _ in range(4):
+        queue.push(Waiter(), "a", BULK)
+    queue.push(Waiter(), "b", BULK)
+    queue.push(Waiter(), "b", BULK)
+    assert [flow for _, flow in drain(queue)] == ["a", "b", "a", "b", "a", "a"]
+    assert len(queue) == 0
+
+
+def test_classes_share_slots_by_weight():
+    queue = FairQueue(WEIGHTS)
+    for priority in (BACKGROUND, BULK, INTERACTIVE):
+        for _ in range(30):
+            queue.push(Waiter(), "s", priority)
+    first = [priority for priority, _ in drain(queue)[:22]]
+    assert first.count(INTERACTIVE) == 16
+    assert first.count(BULK) == 4
+    assert first.count(BACKGROUND) == 2
+    assert first[0] == INTERACTIVE
+
+
+def test_steady_interactive_stream_does_not_starve_bulk_or_background():
+    queue = FairQueue(WEIGHTS)
+    queue.push(Waiter(), "scan", BULK)
+    queue.push(Waiter(), BACKGROUND_FLOW, BACKGROUND)
+    served = []
+    for _ in range(20):
+        # Keep interactive work queued at all times.
+        queue.push(Waiter(), "user", INTERACTIVE)
+        served.append(queue.pop().priority)
+    assert BULK in served[:10]
+    assert BACKGROUND in served[:20]
+
+
+def test_idle_class_does_not_bank_turns():
+    queue = FairQueue(WEIGHTS)
+    queue.push(Waiter(), "user", INTERACTIVE)
+    queue.push(Waiter(), "scan", BULK)
+    for _ in range(40):
+        queue.push(Waiter(), "user", INTERACTIVE)
+        queue.pop()
+    for _ in range(10):
+        queue.push(Waiter(), "user", INTERACTIVE)
+    for _ in range(5):
+        queue.push(Waiter(), "scan", BULK)
+    order = [queue.pop().priority for _ in range(5)]
+    assert order.count(BULK) == 1
+
+
+def test_cancelled_waiters_are_skipped():
+    queue = FairQueue(WEIGHTS)
+    gone = Waiter()
+    entry = queue.push(gone, "a", INTERACTIVE)
+    queue.push(Waiter(), "b", INTERACTIVE)
+    gone.cancelled = True
+    queue.leave(entry)
+    assert len(queue) == 1
+    assert queue.pop().flow == "b"
+    assert queue.pop() is None
+    assert queue.snapshot()["a"]["queued"] == 0
+
+
+def test_flow_context_and_background():
+    async def probe():
+        return current_flow(), current_priority()
+
+    async def run():
+        with flow_context("session-1", INTERACTIVE):
+            outer = await probe()
+            inner = await asyncio.create_task(as_background(probe()))
+            after = await probe()
+        return outer, inner, after
+
+    outer, inner, after = asyncio.run(run())
+    assert outer == after == ("session-1", INTERACTIVE)
+    assert inner == (BACKGROUND_FLOW, BACKGROUND)
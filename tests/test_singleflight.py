@@ -0,0 +1,63 @@
+"""Unit tests for core.singleflight: coalescing, cancellation and error propagation."""
+
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def test_cancelling_one_waiter_leaves_the_call_and_the_others_alone():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
+    assert calls == [1]
+    assert flight.shared == 1
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def run():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(results) == 2
+    assert all(isinstance(result, ValueError) for result in results)
+    assert results[0] is results[1]
+
+
+def test_key_is_released_once_the_call_completes():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first = await flight.do("k", fetch)
+        assert flight.in_flight == 0
+        return first, await flight.do("k", fetch)
+
+    assert asyncio.run(run()) == (1, 2)
+    assert flight.shared == 0
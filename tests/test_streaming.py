@@ -0,0 +1,118 @@
+"""Unit tests for core.streaming: size-capped body reads, spilling and incremental decoding."""
+
+import asyncio
+import io
+import json
+import random
+
+import httpx
+import pytest
+
+from core.streaming import IncrementalDecoder, ResponseBody, read_body
+
+USERS = {
+    "user_list": [
+        {"user_id": i, "name": f"User }},{{ {i} é", "email": f"user{i}@example.com", "tags": [{"a": 1}, {"b": [i]}]}
+        for i in range(500)
+    ],
+    "total": 500,
+    "ratio": 1.5e10,
+    "empty": [],
+    "nested": {"a": [1, 2]},
+}
+
+
+def decode(document: bytes, chunk_bytes: int = 64 * 1024):
+    return IncrementalDecoder(io.BytesIO(document), chunk_bytes).decode()
+
+
+@pytest.mark.parametrize("indent", [None, 1])
+@pytest.mark.parametrize("chunk_bytes", [1, 3, 64, 1000, 65536])
+def test_decoder_matches_json_loads(indent, chunk_bytes):
+    document = json.dumps(USERS, ensure_ascii=False, indent=indent).encode()
+    assert decode(document, chunk_bytes) == USERS
+
+
+def test_decoder_matches_json_loads_on_random_documents():
+    rnd = random.Random(7)
+
+    def value(depth=0):
+        kind = rnd.random()
+        if depth > 3 or kind < 0.4:
+            return rnd.choice([rnd.randint(-10**6, 10**6), rnd.uniform(-1e6, 1e6), "x},{" * rnd.randint(0, 3), True, None])
+        if kind < 0.7:
+            return [value(depth + 1) for _ in range(rnd.randint(0, 5))]
+        return {f"k{i}": value(depth + 1) for i in range(rnd.randint(0, 4))}
+
+    for _ in range(500):
+        document = json.dumps(value(), indent=rnd.choice([None, 1])).encode()
+        for chunk_bytes in (1, 5, 40):
+            assert decode(document, chunk_bytes) == json.loads(document)
+
+
+def test_decoder_completes_numbers_split_across_chunks():
+    assert decode(b'{"a": 1.5e10, "b": [12345, -6.25]}', chunk_bytes=1) == {"a": 1.5e10, "b": [12345, -6.25]}
+    assert decode(b"123456", chunk_bytes=2) == 123456
+
+
+def test_decoder_shares_keys_between_elements():
+    document = json.dumps({"user_list": [{"user_id": i} for i in range(5000)]}).encode()
+    items = decode(document, chunk_bytes=1024)["user_list"]
+    # One key object per decoded window, not one per element.
+    assert len({id(next(iter(item))) for item in items}) < len(items) // 50
+
+
+@pytest.mark.parametrize("document", [b"[1,2", b'{"a":1', b"[1 2]", b"[1,]", b'{"a":1} x', b"", b"{1:2}", b'{"a":1,2:3}'])
+def test_decoder_rejects_invalid_documents(document):
+    with pytest.raises(json.JSONDecodeError):
+        decode(document, chunk_bytes=3)
+
+
+def test_head_reads_only_the_requested_prefix():
+    body = ResponseBody(spill_bytes=0)
+    for chunk in (b"abc", b"defg", b"hi"):
+        body.write(chunk)
+    assert body.head(5) == b"abcde"
+    assert body.head(3) == b"abc"
+    assert body.head(0) == b"abcdefghi"
+
+
+def _read(content, max_bytes: int, spill_bytes: int, chunked: bool = False) -> ResponseBody:
+    async def stream():
+        for start in range(0, len(content), 1000):
+            yield content[start:start + 1000]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # A streamed body carries no Content-Length, so only the running count can enforce the cap.
+        return httpx.Response(200, content=stream() if chunked else content)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            response = await client.send(client.build_request("GET", "http://stub.local/users"), stream=True)
+            return await read_body(response, max_bytes, spill_bytes)
+
+    return asyncio.run(run())
+
+
+def test_small_body_stays_in_memory():
+    document = json.dumps(USERS).encode()
+    with _read(document, max_bytes=0, spill_bytes=len(document)) as body:
+        assert not body.spilled and not body.oversized
+        assert body.decode() == USERS
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_large_body_spills_to_disk_and_decodes(chunked):
+    document = json.dumps(USERS).encode()
+    with _read(document, max_bytes=0, spill_bytes=1000, chunked=chunked) as body:
+        assert body.spilled and body.size == len(document)
+        assert body.head(20) == document[:20]
+        assert body.decode() == USERS
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_body_over_the_cap_is_flagged_oversized(chunked):
+    document = json.dumps(USERS).encode()
+    body = _read(document, max_bytes=5000, spill_bytes=1000, chunked=chunked)
+    assert body.oversized and not body.spilled
+    assert body.size > 5000
@@ -0,0 +1,87 @@
+"""Unit tests for core.warming: hot-key scoring for the cache warmer and the prefetch in-flight cap."""
+
+import asyncio
+import time
+
+from core.warming import CacheWarmer, Prefetcher
+
+URL = "http://stub.local/templates"
+
+
+async def refresh():
+    return None
+
+
+def warmer(enabled: bool = True, half_life: float = 60, max_keys: int = 20, max_tracked: int = 100) -> CacheWarmer:
+    hot = CacheWarmer(enabled, interval=5, min_hits=3, half_life=half_life, max_keys=max_keys,
+                      max_tracked=max_tracked)
+    hot.watch(URL)
+    return hot
+
+
+def lookups(warmer: CacheWarmer, key: str, count: int, api_url: str = URL):
+    for _ in range(count):
+        warmer.record(key, api_url, refresh)
+
+
+def test_keys_need_min_hits_and_the_hottest_come_first():
+    hot = warmer(max_keys=2)
+    lookups(hot, "a", 3)
+    lookups(hot, "b", 5)
+    lookups(hot, "c", 4)
+    lookups(hot, "d", 2)
+    lookups(hot, "e", 9, api_url="http://stub.local/unwatched")
+    assert hot.hot_keys() == ["b", "c"]
+
+
+def test_scores_decay_with_the_half_life():
+    hot = warmer(half_life=0.05)
+    lookups(hot, "a", 4)
+    assert hot.hot_keys() == ["a"]
+    time.sleep(0.06)
+    # 4 hits, one half-life ago: below min_hits, but not cold enough to forget.
+    assert hot.hot_keys() == []
+    assert len(hot._keys) == 1
+    time.sleep(0.25)
+    hot.hot_keys()
+    assert len(hot._keys) == 0
+
+
+def test_nothing_is_recorded_while_warming_is_disabled():
+    hot = warmer(enabled=False)
+    lookups(hot, "a", 5)
+    assert hot.hot_keys() == []
+    assert len(hot._keys) == 0
+
+
+def test_tracked_keys_are_capped_keeping_the_hottest():
+    hot = warmer(max_tracked=8)
+    lookups(hot, "hot", 5)
+    for n in range(100):
+        lookups(hot, f"once-{n}", 1)
+    assert len(hot._keys) <= 8
+    assert hot.hot_keys() == ["hot"]
+
+
+def test_prefetches_are_capped_per_upstream():
+    prefetcher = Prefetcher(enabled=True, top_n=5, max_in_flight=2)
+    fetched = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def fetch_one(record_id: str):
+            fetched.append(record_id)
+            await release.wait()
+
+        prefetcher.schedule("prefetch-test", [1, None, 2, 3, 4, 5, 6], fetch_one)
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*prefetcher._tasks)
+        # Slots free again once the prefetches finish.
+        prefetcher.schedule("prefetch-test", [7], fetch_one)
+        await asyncio.gather(*prefetcher._tasks)
+
+    asyncio.run(run())
+    assert fetched == ["1", "2", "7"]
+    assert (prefetcher.started, prefetcher.skipped) == (3, 3)
@@ -0,0 +1,65 @@
+"""Unit tests for multi-worker coordination: merged metrics and disk-cache leases."""
+
+import asyncio
+
+from core.disk_cache import DiskCache
+from core.metrics import MetricsRegistry, merge_expositions
+
+
+def test_worker_expositions_merge_under_one_header():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(1.0,))
+    calls.inc(tool="a")
+    latency.observe(0.5)
+    first = registry.render(worker="1")
+    calls.inc(tool="a")
+    second = registry.render(worker="2")
+
+    merged = merge_expositions([first, second]).splitlines()
+    assert merged.count("# HELP calls_total Calls") == 1
+    assert merged.count("# TYPE calls_total counter") == 1
+    start = merged.index("# TYPE calls_total counter")
+    assert merged[start + 1:start + 3] == [
+        'calls_total{tool="a",worker="1"} 1.0',
+        'calls_total{tool="a",worker="2"} 2.0',
+    ]
+    assert 'latency_seconds_count{worker="2"} 1' in merged
+    assert sum(line.startswith("# TYPE latency_seconds_quantile") for line in merged) == 1
+
+
+def test_lease_has_one_owner_until_it_expires_or_is_released(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, stale_seconds=0, enabled=True)
+
+    async def run():
+        assert await cache.claim("index:users", "1", ttl=60)
+        assert not await cache.claim("index:users", "2", ttl=60)
+        assert await cache.claim("index:users", "1", ttl=60)
+        await cache.release("index:users", "1")
+        assert await cache.claim("index:users", "2", ttl=0)
+        assert await cache.claim("index:users", "1", ttl=60)
+
+    try:
+        asyncio.run(run())
+    finally:
+        cache.close()
+
+
+def test_shared_values_by_key_and_prefix(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, stale_seconds=0, enabled=True)
+
+    async def run():
+        await cache.put("metrics:1", "a", ttl=60)
+        await cache.put("metrics:2", "b", ttl=60)
+        await cache.put("metrics:3", "c", ttl=0)
+        await cache.put("index:users", [{"user_id": 1}], ttl=60)
+        assert await cache.get_prefix("metrics:") == {"metrics:1": "a", "metrics:2": "b"}
+        assert await cache.get_value("index:users") == [{"user_id": 1}]
+        assert await cache.get_value("index:user") is None
+        await cache.delete("metrics:1")
+        assert await cache.get_prefix("metrics:") == {"metrics:2": "b"}
+
+    try:
+        asyncio.run(run())
+    finally:
+        cache.close()
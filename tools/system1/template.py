@@ -1,34 +1,166 @@
+from typing import List, Optional
+from core.batch import fetch_many
 from core.call_api import call_api
-from common.decorator import log_function_call
+from core.index import RecordIndex, indexes
+from core.limiter import limiters
+from core.pagination import fetch_all_items, paginate_list
+from core.projection import QueryError, Where, check_fields, project_item, project_items
+from core.scheduler import BULK, INTERACTIVE
+from core.warming import cache_warmer, prefetcher
+from common.decorator import log_function_call, measure_tool_call, prioritized, with_deadline
 from tools.toolbase import ToolsBase, tool
+from config.config import Config
 from config.endpoints.system1 import System1Endpoints
+from schemas.system1.template import Template, TemplateDetail
+
+template_index = indexes.register(RecordIndex(
+    "templates",
+    key_field="template_id",
+    indexed_fields=["template_name", "account"],
+    fetch_items=lambda: fetch_all_items(
+        System1Endpoints.TEMPLATE_LIST_URL, "template_list", System1Endpoints.TEMPLATE_LIST_UPSTREAM_PAGING
+    ),
+    refresh_seconds=Config.INDEX_REFRESH_SECONDS,
+))
+cache_warmer.watch(System1Endpoints.TEMPLATE_LIST_URL)
 
 
 class TemplateTools(ToolsBase):
+    async def _fetch_template_detail(self, template_id: str, fields: Optional[List[str]] = None) -> dict:
+        # List records lack detail-only fields (e.g. body), so the index only answers narrower projections,
+        # and only while it is no older than a cached detail could be.
+        if (fields and all(name in Template.model_fields for name in fields)
+                and template_index.is_fresh(System1Endpoints.TEMPLATE_DETAIL_CACHE_TTL)):
+            record = template_index.get(template_id)
+            if record is not None:
+                return project_item(record, fields)
+
+        url = f"{System1Endpoints.TEMPLATE_DETAIL_URL}/{template_id}"
+        result = await call_api(http_method="GET", api_url=url, cache_ttl=System1Endpoints.TEMPLATE_DETAIL_CACHE_TTL,
+                                timeout=System1Endpoints.TEMPLATE_DETAIL_TIMEOUT)
+        return project_item(result, fields)
+
     @log_function_call
+    @measure_tool_call
+    @prioritized(BULK)
+    @with_deadline
     @tool
-    async def get_template_list(self) -> dict:
+    async def get_template_list(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                                fields: Optional[List[str]] = None, where: Optional[Where] = None) -> dict:
         """
-        Get a list of templates.
+        Get a list of templates, one page at a time.
+
+        Args:
+            limit: Page size (default and maximum are server-configured)
+            cursor: next_cursor from the previous page; omit for the first page
+            fields: Template fields to return, e.g. ["template_id", "template_name"]; all fields if omitted
+            where: Field filters, exact match (strings, numbers or booleans) or prefix match with a trailing "*", e.g. {"template_name": "Invoice*"}
 
         Returns:
-            TemplateList
+            TemplateList page with next_cursor (None on the last page)
         """
-        result = await call_api(http_method="GET", api_url=System1Endpoints.TEMPLATE_LIST_URL)
-        return result
+        try:
+            check_fields(Template, fields or [], "fields")
+            check_fields(Template, where or {}, "where")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        page = await paginate_list(
+            System1Endpoints.TEMPLATE_LIST_URL,
+            "template_list",
+            cache_ttl=System1Endpoints.TEMPLATE_LIST_CACHE_TTL,
+            limit=limit,
+            cursor=cursor,
+            upstream_paging=System1Endpoints.TEMPLATE_LIST_UPSTREAM_PAGING,
+            fields=fields,
+            where=where,
+            timeout=System1Endpoints.TEMPLATE_LIST_TIMEOUT,
+        )
+        prefetcher.schedule(
+            System1Endpoints.NAME,
+            (item.get("template_id") for item in page.get("template_list", [])),
+            self._fetch_template_detail,
+        )
+        return page
 
     @log_function_call
+    @measure_tool_call
+    @prioritized(INTERACTIVE)
+    @with_deadline
     @tool
-    async def get_template_detail(self, template_id: str) -> dict:
+    async def get_template_detail(self, template_id: str, fields: Optional[List[str]] = None) -> dict:
         """
         Get template details.
 
         Args:
             template_id: Template ID
+            fields: TemplateDetail fields to return, e.g. ["subject", "body"]; all fields if omitted
 
         Returns:
             TemplateDetail
         """
-        url = f"{System1Endpoints.TEMPLATE_DETAIL_URL}/{template_id}"
-        result = await call_api(http_method="GET", api_url=url)
-        return result
+        try:
+            check_fields(TemplateDetail, fields or [], "fields")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        return await self._fetch_template_detail(template_id, fields)
+
+    @log_function_call
+    @measure_tool_call
+    @prioritized(BULK)
+    @with_deadline
+    @tool
+    async def get_template_details(self, template_ids: List[str], fields: Optional[List[str]] = None) -> dict:
+        """
+        Get details for several templates in one call.
+
+        Args:
+            template_ids: Template IDs (duplicates are ignored)
+            fields: TemplateDetail fields to return; all fields if omitted
+
+        Returns:
+            {"results": {template_id: TemplateDetail}, "errors": {template_id: message}}
+        """
+        try:
+            check_fields(TemplateDetail, fields or [], "fields")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        return await fetch_many(
+            template_ids,
+            lambda template_id: self._fetch_template_detail(template_id, fields),
+            concurrency=limiters.get(System1Endpoints.NAME).limit,
+        )
+
+    @log_function_call
+    @measure_tool_call
+    @prioritized(INTERACTIVE)
+    @with_deadline
+    @tool
+    async def find_template(self, template_name: Optional[str] = None, account: Optional[int] = None,
+                            fields: Optional[List[str]] = None) -> dict:
+        """
+        Find templates by exact name (case-insensitive) and/or account from the local index.
+
+        Args:
+            template_name: Template name
+            account: Account number
+            fields: Template fields to return; all list fields if omitted
+
+        Returns:
+            TemplateList of matching templates
+        """
+        criteria = {key: value for key, value in (("template_name", template_name), ("account", account)) if value is not None}
+        if not criteria:
+            return {"status": "error", "message": "Specify at least one of template_name or account"}
+        try:
+            check_fields(Template, fields or [], "fields")
+            await template_index.ensure_fresh()
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            return {"status": "error", "message": f"Template index unavailable: {e}"}
+
+        matches = template_index.find(criteria)
+        return {"template_list": project_items(matches[:Config.LIST_PAGE_MAX_LIMIT], fields), "total": len(matches)}
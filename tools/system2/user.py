@@ -1,34 +1,164 @@
+from typing import List, Optional
+from core.batch import fetch_many
 from core.call_api import call_api
-from common.decorator import log_function_call
+from core.index import RecordIndex, indexes
+from core.limiter import limiters
+from core.pagination import fetch_all_items, paginate_list
+from core.projection import QueryError, Where, check_fields, project_item, project_items
+from core.scheduler import BULK, INTERACTIVE
+from core.warming import cache_warmer, prefetcher
+from common.decorator import log_function_call, measure_tool_call, prioritized, with_deadline
 from tools.toolbase import ToolsBase, tool
+from config.config import Config
 from config.endpoints.system2 import System2Endpoints
+from schemas.system2.user import User
+
+user_index = indexes.register(RecordIndex(
+    "users",
+    key_field="user_id",
+    indexed_fields=["email", "name", "role"],
+    fetch_items=lambda: fetch_all_items(
+        System2Endpoints.USER_LIST_URL, "user_list", System2Endpoints.USER_LIST_UPSTREAM_PAGING
+    ),
+    refresh_seconds=Config.INDEX_REFRESH_SECONDS,
+))
+cache_warmer.watch(System2Endpoints.USER_LIST_URL)
 
 
 class UserTools(ToolsBase):
+    async def _fetch_user_detail(self, user_id: str, fields: Optional[List[str]] = None) -> dict:
+        # Only while the index is no older than a cached detail could be.
+        record = user_index.get(user_id) if user_index.is_fresh(System2Endpoints.USER_DETAIL_CACHE_TTL) else None
+        if record is not None:
+            return project_item(record, fields)
+
+        url = f"{System2Endpoints.USER_DETAIL_URL}/{user_id}"
+        result = await call_api(http_method="GET", api_url=url, cache_ttl=System2Endpoints.USER_DETAIL_CACHE_TTL,
+                                timeout=System2Endpoints.USER_DETAIL_TIMEOUT)
+        return project_item(result, fields)
+
     @log_function_call
+    @measure_tool_call
+    @prioritized(BULK)
+    @with_deadline
     @tool
-    async def get_user_list(self) -> dict:
+    async def get_user_list(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None, where: Optional[Where] = None) -> dict:
         """
-        Get a list of users.
+        Get a list of users, one page at a time.
+
+        Args:
+            limit: Page size (default and maximum are server-configured)
+            cursor: next_cursor from the previous page; omit for the first page
+            fields: User fields to return, e.g. ["user_id", "email"]; all fields if omitted
+            where: Field filters, exact match (strings, numbers or booleans) or prefix match with a trailing "*", e.g. {"role": "admin"}
 
         Returns:
-            UserList
+            UserList page with next_cursor (None on the last page)
         """
-        result = await call_api(http_method="GET", api_url=System2Endpoints.USER_LIST_URL)
-        return result
+        try:
+            check_fields(User, fields or [], "fields")
+            check_fields(User, where or {}, "where")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        page = await paginate_list(
+            System2Endpoints.USER_LIST_URL,
+            "user_list",
+            cache_ttl=System2Endpoints.USER_LIST_CACHE_TTL,
+            limit=limit,
+            cursor=cursor,
+            upstream_paging=System2Endpoints.USER_LIST_UPSTREAM_PAGING,
+            fields=fields,
+            where=where,
+            timeout=System2Endpoints.USER_LIST_TIMEOUT,
+        )
+        prefetcher.schedule(
+            System2Endpoints.NAME,
+            (item.get("user_id") for item in page.get("user_list", [])),
+            self._fetch_user_detail,
+        )
+        return page
 
     @log_function_call
+    @measure_tool_call
+    @prioritized(INTERACTIVE)
+    @with_deadline
     @tool
-    async def get_user_detail(self, user_id: str) -> dict:
+    async def get_user_detail(self, user_id: str, fields: Optional[List[str]] = None) -> dict:
         """
         Get user details.
 
         Args:
             user_id: User ID
+            fields: User fields to return; all fields if omitted
 
         Returns:
             UserDetail
         """
-        url = f"{System2Endpoints.USER_DETAIL_URL}/{user_id}"
-        result = await call_api(http_method="GET", api_url=url)
-        return result
+        try:
+            check_fields(User, fields or [], "fields")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        return await self._fetch_user_detail(user_id, fields)
+
+    @log_function_call
+    @measure_tool_call
+    @prioritized(BULK)
+    @with_deadline
+    @tool
+    async def get_user_details(self, user_ids: List[str], fields: Optional[List[str]] = None) -> dict:
+        """
+        Get details for several users in one call.
+
+        Args:
+            user_ids: User IDs (duplicates are ignored)
+            fields: User fields to return; all fields if omitted
+
+        Returns:
+            {"results": {user_id: UserDetail}, "errors": {user_id: message}}
+        """
+        try:
+            check_fields(User, fields or [], "fields")
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+
+        return await fetch_many(
+            user_ids,
+            lambda user_id: self._fetch_user_detail(user_id, fields),
+            concurrency=limiters.get(System2Endpoints.NAME).limit,
+        )
+
+    @log_function_call
+    @measure_tool_call
+    @prioritized(INTERACTIVE)
+    @with_deadline
+    @tool
+    async def find_user(self, email: Optional[str] = None, name: Optional[str] = None,
+                        role: Optional[str] = None, fields: Optional[List[str]] = None) -> dict:
+        """
+        Find users by exact email, name and/or role (case-insensitive) from the local index.
+
+        Args:
+            email: Email address
+            name: User name
+            role: Role
+            fields: User fields to return; all fields if omitted
+
+        Returns:
+            UserList of matching users
+        """
+        criteria = {key: value for key, value in (("email", email), ("name", name), ("role", role)) if value is not None}
+        if not criteria:
+            return {"status": "error", "message": "Specify at least one of email, name or role"}
+        try:
+            check_fields(User, fields or [], "fields")
+            await user_index.ensure_fresh()
+        except QueryError as e:
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            return {"status": "error", "message": f"User index unavailable: {e}"}
+
+        matches = user_index.find(criteria)
+        return {"user_list": project_items(matches[:Config.LIST_PAGE_MAX_LIMIT], fields), "total": len(matches)}